@@ -0,0 +1,159 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+"""
+Processes many files over a pool of long lived worker processes.
+
+Each worker calls the sink factory with the file name, parses the file into the sinks it returns
+and sends back a picklable result (by default result(sinks), the sinks themselves).
+Results come back in the order of the file list whatever order the files finish in,
+a file that fails is reported with its traceback without stopping the others.
+"""
+
+from collections import namedtuple
+from glob import glob
+from multiprocessing import Pool, cpu_count
+import os
+import sys
+import traceback
+
+import Parse
+from Pipeline import CheckpointSink
+
+FileResult = namedtuple('FileResult', 'fileName result error')
+
+#**************************************************************************************************
+def expandFiles(patterns):
+    """
+    Expands glob patterns and @list files (one file name per line) into file names, in argument order
+    """
+    fileNames = []
+    for pattern in patterns:
+        if pattern.startswith('@'):
+            with open(pattern[1:]) as listFile:
+                fileNames.extend(line.strip() for line in listFile if line.strip())
+        else:
+            fileNames.extend(sorted(glob(pattern)) or [pattern])     # left as is to be reported missing
+    return fileNames
+
+#**************************************************************************************************
+def processOne(args):
+    """
+    Worker: parses one file into the sinks made by the factory, never raises.
+    The streams of the sinks of a failed file are closed, a long run would otherwise run out of handles.
+    """
+    fileName, sinkFactory, result, options = args
+    sinks = None
+    try:
+        sinks = sinkFactory(fileName)
+        Parse.process_file(fileName, sinks, **options)
+        return FileResult(fileName, result(sinks) if result else sinks, None)
+    except Exception:
+        error = traceback.format_exc()
+        if sinks is not None:
+            try:
+                closeStreams(sinks)
+            except Exception:
+                pass                # the parse error is the one reported
+        return FileResult(fileName, None, error)
+
+def indexed(args):
+    ndx, task = args
+    return ndx, processOne(task)
+
+#**************************************************************************************************
+def printProgress(done, total, fileResult, stream=sys.stderr):
+    status = 'failed' if fileResult.error else 'ok'
+    stream.write('[%d/%d] %s %s\n' % (done, total, fileResult.fileName, status))
+
+#**************************************************************************************************
+def process_files(fileNames, sinkFactory, jobs=None, result=None, progress=printProgress, **options):
+    """
+    Parses every file with jobs processes (one per CPU by default, in process with jobs=1) and
+    returns a FileResult per file in the order of fileNames.
+    sinkFactory and result must be picklable (module level functions or classes),
+    options are passed on to Parse.process_file.
+    progress(done, total, fileResult) is called as files complete, None for silence.
+    """
+    tasks = [(fileName, sinkFactory, result, options) for fileName in fileNames]
+    jobs = min(jobs or cpu_count(), len(tasks)) or 1
+    results = [None] * len(tasks)
+    if jobs == 1:
+        completed = ((ndx, processOne(task)) for ndx, task in enumerate(tasks))
+        pool = None
+    else:
+        pool = Pool(jobs)
+        completed = pool.imap_unordered(indexed, enumerate(tasks))
+    try:
+        for done, (ndx, fileResult) in enumerate(completed, 1):
+            results[ndx] = fileResult
+            if progress:
+                progress(done, len(tasks), fileResult)
+        if pool:
+            pool.close()
+    except:
+        if pool:
+            pool.terminate()
+        raise
+    finally:
+        if pool:
+            pool.join()
+    return results
+
+#**************************************************************************************************
+class WriterFactory(object):
+    """
+    Sink factory writing each file out through a writer class into outDir as <file name>.<extension>
+    """
+    def __init__(self, writerClass, extension, outDir='.'):
+        self.writerClass = writerClass
+        self.extension = extension
+        self.outDir = outDir
+
+    def __call__(self, fileName):
+        base = os.path.basename(fileName)
+        for suffix in ('.gz', '.bz2', '.bz'):
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+        stream = open(os.path.join(self.outDir, '%s.%s' % (base, self.extension)), 'w')
+        return [self.writerClass(stream)]
+
+#**************************************************************************************************
+class RecordCounter(CheckpointSink):
+    """
+    Counts the records of each type
+    """
+    def __init__(self):
+        self.counts = dict()
+
+    def before_header(self, _, header):
+        self.counts[header.name] = self.counts.get(header.name, 0) + 1
+
+def countRecords(fileName):
+    return [RecordCounter()]
+
+def recordCounts(sinks):
+    return sinks[0].counts
+
+def closeStreams(sinks):
+    for sink in sinks:
+        stream = getattr(sink, 'stream', None)
+        if stream is not None and stream not in (sys.stdout, sys.stderr):
+            stream.close()
+    return None
@@ -18,11 +18,12 @@
 #
 
 from pprint import pprint
-from Pipeline import EventSource
+from Pipeline import EventSource, CheckpointSink
 from Parse import process_file
 import V4
 
-class BinSummarizer(EventSource):
+class BinSummarizer(EventSource, CheckpointSink):
+    recordTypes = ('Prr', 'Hbr', 'Sbr')
     FLAG_SYNTH = 0x80
     FLAG_FAIL = 0x08
     FLAG_UNKNOWN = 0x02
@@ -106,6 +107,27 @@ class BinSummarizer(EventSource):
         elif record.name == self.sbr.name:
             self.onSbr(record.values)
 
+    @staticmethod
+    def mergeParts(parts, otherParts):
+        for key, (otherCount, otherPass) in otherParts.iteritems():
+            countList, passList = parts.setdefault(key, ([0], otherPass[:]))
+            countList[0] += otherCount[0]
+            if passList[0] is None:
+                passList[0] = otherPass[0]
+            elif passList[0] != ' ' and otherPass[0] is not None and passList[0] != otherPass[0]:
+                passList[0] = ' '
+
+    def merge(self, other):
+        """
+        Folds in the bins of the following chunk of the file, see Parallel
+        """
+        self.mergeParts(self.hbinParts, other.hbinParts)
+        self.mergeParts(self.sbinParts, other.sbinParts)
+        self.summaryHbrs.update(other.summaryHbrs)
+        self.summarySbrs.update(other.summarySbrs)
+        self.overallHbrs.update(other.overallHbrs)
+        self.overallSbrs.update(other.overallSbrs)
+
     def onPrr(self, row):
         countList, passList = self.hbinParts.setdefault((row[self.prr.SITE_NUM], row[self.prr.HARD_BIN]), ([0], [None]))
         countList[0] += 1
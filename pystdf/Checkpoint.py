@@ -0,0 +1,111 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+"""
+Snapshots of a parse for resuming it later, in another run.
+
+A checkpoint holds the stream offset of a record boundary, the byte order and the state of the
+checkpoint-aware sinks (those with checkpointState()/restoreState(), see Pipeline.CheckpointSink)
+as it was once every record ahead of the offset was sent. It is only taken up again when the
+file still has the same bytes ahead of the offset, so a file that was appended to since resumes
+where it left off and only the new records are parsed. A parse with a sink taking records that
+is not checkpoint-aware (e.g. a writer) never resumes, that sink would miss the records ahead of the offset.
+"""
+
+import cPickle
+import os
+import zlib
+
+WINDOW = 64 * 1024      # bytes ahead of the offset whose CRC tells the file has not changed
+RECORD_EVENTS = tuple(prefix + event for event in ('send', 'header', 'context') for prefix in ('before_', 'after_'))
+
+#**************************************************************************************************
+def aware(sinks):
+    return [sink for sink in sinks if hasattr(sink, 'checkpointState')]
+
+#**************************************************************************************************
+def unaware(sinks):
+    """
+    Returns the sinks taking records whose state cannot be saved
+    """
+    return [sink for sink in sinks if not hasattr(sink, 'checkpointState') and
+            any(hasattr(sink, event) for event in RECORD_EVENTS)]
+
+#**************************************************************************************************
+def fingerprint(inp, offset):
+    """
+    Returns the CRC and length of the bytes ahead of offset, leaving the stream where it was
+    """
+    location = inp.tell()
+    start = max(0, offset - WINDOW)
+    inp.seek(start)
+    data = str(inp.read(offset - start))
+    inp.seek(location)
+    return zlib.crc32(data) & 0xffffffff, len(data)
+
+#**************************************************************************************************
+def save(fileName, parser):
+    """
+    Snapshots the parser at its current offset, which must be a record boundary
+    """
+    offset = parser.inp.tell()
+    sinks = aware(parser.sinks)
+    state = dict(offset=offset, endian=parser.codec.endian, fingerprint=fingerprint(parser.inp, offset),
+                 sinkTypes=[type(sink).__name__ for sink in sinks],
+                 unawareTypes=[type(sink).__name__ for sink in unaware(parser.sinks)],
+                 sinks=[sink.checkpointState() for sink in sinks])
+    tmpName = fileName + '.tmp'
+    with open(tmpName, 'wb') as out:
+        cPickle.dump(state, out, cPickle.HIGHEST_PROTOCOL)
+    if os.name == 'nt' and os.path.exists(fileName):
+        os.remove(fileName)             # rename does not replace on Windows
+    os.rename(tmpName, fileName)        # a run dying mid save leaves the previous checkpoint whole
+
+#**************************************************************************************************
+def load(fileName):
+    """
+    Returns the saved state, None when there is no readable checkpoint
+    """
+    try:
+        with open(fileName, 'rb') as inp:
+            return cPickle.load(inp)
+    except (IOError, EOFError, cPickle.UnpicklingError):
+        return None
+
+#**************************************************************************************************
+def resume(fileName, parser):
+    """
+    Restores the sinks and moves the parser to the checkpoint offset once the begin event was sent,
+    returns the offset resumed from, None when the checkpoint is missing or does not match,
+    or when a sink taking records could not be restored (the parse then starts from the beginning)
+    """
+    state = load(fileName)
+    if state is None or state['endian'] != parser.codec.endian:
+        return None
+    if unaware(parser.sinks) or 'unawareTypes' not in state:      # else from before unaware sinks were recorded
+        return None
+    sinks = aware(parser.sinks)
+    if state['sinkTypes'] != [type(sink).__name__ for sink in sinks]:
+        return None
+    if fingerprint(parser.inp, state['offset']) != state['fingerprint']:
+        return None                     # the file was rewritten (or cut short) ahead of the offset
+    for sink, sinkState in zip(sinks, state['sinks']):
+        sink.restoreState(sinkState)
+    parser.inp.seek(state['offset'])
+    return state['offset']
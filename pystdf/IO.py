@@ -18,13 +18,27 @@
 #
 
 from struct import calcsize, unpack_from, unpack, Struct, pack, error
+from bisect import bisect_right
+from numbers import Number
+import copy
+import mmap
+import os
+import zlib
 import Types
 import types
 import ujson
 
-_endian = '@'
-_unpackHeader = Struct('@HBB').unpack
-_packHeader = Struct('@HBB').pack
+try:
+    import numpy
+    have_numpy = True
+except ImportError:
+    have_numpy = False
+
+try:
+    import indexed_gzip
+    have_indexed_gzip = True
+except ImportError:
+    have_indexed_gzip = False
 
 _stdf2struct = {
     "C1": "c",
@@ -41,53 +55,381 @@ _stdf2struct = {
     "R8": "d",
 }
 
-stdf2unpack = {  # STDF format identifier to struct format identifier - updated with detectEndian
-    "C1": (Struct("@c").unpack_from, calcsize("c")),
-    "B1": (Struct("@B").unpack_from, calcsize("B")),
-    "U1": (Struct("@B").unpack_from, calcsize("B")),
-    "U2": (Struct("@H").unpack_from, calcsize("H")),
-    "U4": (Struct("@I").unpack_from, calcsize("I")),
-    "U8": (Struct("@Q").unpack_from, calcsize("Q")),
-    "I1": (Struct("@b").unpack_from, calcsize("b")),
-    "I2": (Struct("@h").unpack_from, calcsize("h")),
-    "I4": (Struct("@i").unpack_from, calcsize("i")),
-    "I8": (Struct("@q").unpack_from, calcsize("q")),
-    "R4": (Struct("@f").unpack_from, calcsize("f")),
-    "R8": (Struct("@d").unpack_from, calcsize("d")),
-}
+#**********************************************************************************************
+class StringTable(dict):
+    """
+    Intern table of the Cn strings decoded by one parser, keyed on the raw bytes.
+    Repeated values such as TEST_TXT and UNITS come back as one shared string object.
+    Once maxSize distinct strings are held new ones are passed through uninterned
+    """
+    def __init__(self, maxSize=1 << 16):
+        super(StringTable, self).__init__()
+        self.maxSize = maxSize
+        self.lookups = 0
+        self.misses = 0
 
-stdf2pack = {  # STDF format identifier to struct format identifier - updated with detectEndian
-    "C1": (Struct("@c").pack, calcsize("c")),
-    "B1": (Struct("@B").pack, calcsize("B")),
-    "U1": (Struct("@B").pack, calcsize("B")),
-    "U2": (Struct("@H").pack, calcsize("H")),
-    "U4": (Struct("@I").pack, calcsize("I")),
-    "U8": (Struct("@Q").pack, calcsize("Q")),
-    "I1": (Struct("@b").pack, calcsize("b")),
-    "I2": (Struct("@h").pack, calcsize("h")),
-    "I4": (Struct("@i").pack, calcsize("i")),
-    "I8": (Struct("@q").pack, calcsize("q")),
-    "R4": (Struct("@f").pack, calcsize("f")),
-    "R8": (Struct("@d").pack, calcsize("d")),
-}
+    #==============================================================================================
+    def __missing__(self, raw):
+        self.misses += 1
+        if len(self) < self.maxSize:
+            self[raw] = raw
+        return raw
+
+    #==============================================================================================
+    def stats(self):
+        """
+        Returns the count of distinct strings held, lookups, hits and the hit rate
+        """
+        hits = self.lookups - self.misses
+        return dict(strings=len(self), lookups=self.lookups, hits=hits,
+                    hitRate=float(hits) / self.lookups if self.lookups else 0.0)
 
 #**********************************************************************************************
-def detectEndian(inp):
+class Codec(object):
+    """
+    The struct tables for one byte order.
+    Each parser and writer owns its codec so files of different CPU_TYPE can be handled side by side
+    With numpyArrays set the fixed width array fields are decoded into NumPy arrays instead of lists
+    With internStrings set the Cn fields are shared through the StringTable in strings
+    """
+    def __init__(self, endian='@', numpyArrays=False, internStrings=False):
+        if numpyArrays and not have_numpy:
+            raise ImportError('NumPy is required for numpyArrays')
+        self.endian = endian
+        self.numpyArrays = numpyArrays
+        self.strings = StringTable() if internStrings else None
+        self.arrayUnpackers = dict()    # (STDF format identifier, count) to struct unpacker and size
+        header = Struct('%sHBB' % endian)
+        self.unpackHeader = header.unpack
+        self.unpackHeaderFrom = header.unpack_from
+        self.packHeader = header.pack
+        self.packHeaderInto = header.pack_into
+        self.stdf2unpack = dict()  # STDF format identifier to struct unpacker and size
+        self.stdf2pack = dict()    # STDF format identifier to struct packer and size
+        for k, v in _stdf2struct.items():
+            fmt = Struct('%s%s' % (endian, v))
+            self.stdf2unpack[k] = (fmt.unpack_from, calcsize(v))
+            self.stdf2pack[k] = (fmt.pack, calcsize(v))
+
+    #==============================================================================================
+    def arrayUnpacker(self, stdfFmt, count):
+        """
+        Returns the unpacker and size of an array of count fixed width items, built once per shape
+        """
+        key = (stdfFmt, count)
+        unpacker = self.arrayUnpackers.get(key)
+        if unpacker is None:
+            fmt = '%s%d%s' % (self.endian, count, _stdf2struct[stdfFmt])
+            if self.numpyArrays and stdfFmt != 'C1':
+                dtype = numpy.dtype('%s%s' % ('=' if self.endian == '@' else self.endian, _stdf2struct[stdfFmt]))
+                unpacker = (lambda buf, offset: numpy.frombuffer(buf, dtype, count, offset)), calcsize(fmt)
+            else:
+                fmt = Struct(fmt)
+                unpacker = (lambda buf, offset: list(fmt.unpack_from(buf, offset))), fmt.size
+            self.arrayUnpackers[key] = unpacker
+        return unpacker
+
+    #==============================================================================================
+    def __repr__(self):
+        return "<Codec endian='%s'>" % self.endian
+
+#**********************************************************************************************
+def detectEndian(inp, numpyArrays=False, internStrings=False):
+    """
+    Returns the codec matching the CPU_TYPE of the FAR at the start of the stream
+    """
     location = inp.tell()
     inp.seek(0)
-    global _endian, _unpackHeader, _packHeader
-    _endian = '@'
     length, typ, sub, cpuType = unpack('@HBBB', inp.read(5))
     if typ != 0 and sub != 10:
         raise Types.InitialSequenceException()
     inp.seek(location)
-    _endian = '<' if cpuType == 2 else '>'
-    _unpackHeader = Struct('%sHBB' % _endian).unpack
-    _packHeader = Struct('%sHBB' % _endian).pack
-    for k, v in _stdf2struct.items():
-        fmt = '%s%s' % (_endian, v)
-        stdf2unpack[k] = (Struct(fmt).unpack_from, calcsize(v))
-        stdf2pack[k] = (Struct(fmt).pack, calcsize(v))
+    return Codec('<' if cpuType == 2 else '>', numpyArrays, internStrings)
+
+#**********************************************************************************************
+class MappedFile(object):
+    """
+    Read only file-like access to an uncompressed STDF file through a memory map.
+    read() returns zero-copy buffer slices of the mapping (Python 2 mmap objects cannot
+    back a memoryview) so record buffers are views of the OS page cache rather than copies.
+    Records are only valid while the file is open. A Parse.Reader keeps it open until close(), the records
+    it returns refer to it and so keep it alive, process_file() closes it at the end of the parse:
+    sinks keeping records past that copy record.buffer with str() or decode them fully.
+    """
+    def __init__(self, fileName):
+        self.file = open(fileName, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+        self.size = len(self.map)
+        self.pos = 0
+        self.name = fileName
+
+    #==============================================================================================
+    def read(self, size=-1):
+        pos = self.pos
+        end = self.size if size < 0 else min(pos + size, self.size)
+        self.pos = end
+        return buffer(self.map, pos, end - pos)
+
+    #==============================================================================================
+    def tell(self):
+        return self.pos
+
+    #==============================================================================================
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += self.size
+        self.pos = max(0, offset)
+
+    #==============================================================================================
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.file.close()
+            self.map = None
+
+    #==============================================================================================
+    def __enter__(self):
+        return self
+
+    #==============================================================================================
+    def __exit__(self, *args):
+        self.close()
+
+#**********************************************************************************************
+def seekable(inp):
+    """
+    True when inp can seek, what pipes and sockets wrapped as files cannot
+    """
+    try:
+        inp.seek(0, 1)
+        return True
+    except (IOError, OSError, AttributeError):
+        return False
+
+#**********************************************************************************************
+class BlockReader(object):
+    """
+    File-like splitter for compressed streams (gzip, bz2) where small reads are expensive.
+    Pulls large blocks from the decompressor and carves headers and records out of memory,
+    carrying the leftover bytes of a block over to the next one.
+    Over a stream that cannot seek (a pipe) it can still seek within the block in memory,
+    offsets then count from where reading started.
+    """
+    blockSize = 4 * 1024 * 1024
+
+    def __init__(self, inp, blockSize=None):
+        self.inp = inp
+        self.blockSize = blockSize or self.blockSize
+        self.buf = ''
+        self.bufPos = 0          # read position within buf
+        self.bufStart = inp.tell() if seekable(inp) else 0     # stream offset of buf[0]
+        self.name = getattr(inp, 'name', None)
+
+    #==============================================================================================
+    def read(self, size=-1):
+        pos, buf = self.bufPos, self.buf
+        if 0 <= size <= len(buf) - pos:
+            self.bufPos = pos + size
+            return buf[pos:pos + size]
+        chunks = [buf[pos:]]
+        have = len(chunks[0])
+        while size < 0 or have < size:
+            block = self.inp.read(self.blockSize if size < 0 else max(self.blockSize, size - have))
+            if not block:
+                break
+            chunks.append(block)
+            have += len(block)
+        buf = ''.join(chunks)
+        self.bufStart += pos
+        if size < 0 or size >= have:
+            self.buf, self.bufPos = '', 0
+            self.bufStart += have
+            return buf
+        self.buf, self.bufPos = buf, size
+        return buf[:size]
+
+    #==============================================================================================
+    def tell(self):
+        return self.bufStart + self.bufPos
+
+    #==============================================================================================
+    def seek(self, offset, whence=0):
+        if whence == 2:
+            self.inp.seek(offset, 2)
+            self.buf, self.bufPos, self.bufStart = '', 0, self.inp.tell()
+            return
+        if whence == 1:
+            offset += self.tell()
+        if self.bufStart <= offset <= self.bufStart + len(self.buf):
+            self.bufPos = offset - self.bufStart
+            return
+        self.inp.seek(offset)
+        self.buf, self.bufPos, self.bufStart = '', 0, offset
+
+    #==============================================================================================
+    def close(self):
+        self.inp.close()
+
+#**********************************************************************************************
+class GzipAccessPoints(object):
+    """
+    Seekable decompression of a gzip file (zran style): every spacing bytes of output the
+    decompressor state is kept with the compressed offset it has consumed, a seek resumes from the
+    nearest access point before the offset and decompresses at most spacing bytes to reach it.
+    Output is inflated in blocks of at most blockSize bytes that end on the access points.
+    The access points are built as the file is read and live as long as the reader, zlib
+    decompressors cannot be saved. Meant to be wrapped by a BlockReader.
+    """
+    spacing = 8 * 1024 * 1024
+    readSize = 256 * 1024
+    blockSize = 1024 * 1024
+
+    def __init__(self, fileName, spacing=None):
+        self.file = open(fileName, 'rb')
+        self.name = fileName
+        self.spacing = spacing or self.spacing
+        self.points = [(0, 0, None)]    # (uncompressed offset, compressed offset, decompressor)
+        self.restart(self.points[0])
+
+    #==============================================================================================
+    def restart(self, point):
+        offset, self.cpos, decomp = point
+        self.file.seek(self.cpos)
+        self.decomp = decomp.copy() if decomp else zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.pending = ''               # compressed bytes read but not consumed by the decompressor
+        self.out, self.outPos, self.outStart = '', 0, offset
+
+    #==============================================================================================
+    def inflate(self):
+        """
+        Replaces out with the next decompressed block, False at the end of the file
+        """
+        while True:
+            if not self.pending:
+                self.pending = self.file.read(self.readSize)
+                self.cpos += len(self.pending)
+            end = self.outStart + len(self.out)
+            nextPoint = self.points[-1][0] + self.spacing
+            limit = min(nextPoint - end, self.blockSize) if nextPoint > end else self.blockSize
+            if self.pending:
+                out = self.decomp.decompress(self.pending, limit)
+                self.pending = self.decomp.unconsumed_tail
+                if self.decomp.unused_data:             # the end of a gzip member
+                    data = self.decomp.unused_data
+                    if data.strip('\0'):
+                        self.decomp = zlib.decompressobj(16 + zlib.MAX_WBITS)   # concatenated members
+                        self.pending = data
+                    else:
+                        self.pending = ''               # trailing padding
+            else:
+                out = self.decomp.flush()               # the end of the file
+                if not out:
+                    return False
+            if out:
+                self.outStart += len(self.out)
+                self.out, self.outPos = out, 0
+                end = self.outStart + len(out)
+                if end >= self.points[-1][0] + self.spacing:
+                    self.points.append((end, self.cpos - len(self.pending), self.decomp.copy()))
+                return True
+
+    #==============================================================================================
+    def read(self, size=-1):
+        chunks = []
+        while size:
+            if self.outPos == len(self.out) and not self.inflate():
+                break
+            chunk = self.out[self.outPos:] if size < 0 else self.out[self.outPos:self.outPos + size]
+            self.outPos += len(chunk)
+            size -= len(chunk) if size > 0 else 0
+            chunks.append(chunk)
+        return ''.join(chunks)
+
+    #==============================================================================================
+    def tell(self):
+        return self.outStart + self.outPos
+
+    #==============================================================================================
+    def seek(self, offset, whence=0):
+        if whence == 2:
+            while self.inflate():
+                pass
+            self.outPos = len(self.out)
+            offset += self.tell()
+        elif whence == 1:
+            offset += self.tell()
+        if self.outStart <= offset <= self.outStart + len(self.out):
+            self.outPos = offset - self.outStart
+            return
+        point = self.points[bisect_right(self.points, (offset, float('inf'))) - 1]
+        if not point[0] <= self.outStart <= offset:
+            self.restart(point)                     # else reading on is closer than any access point
+        while offset > self.outStart + len(self.out):
+            if not self.inflate():
+                self.outPos = len(self.out)
+                return
+        self.outPos = offset - self.outStart
+
+    #==============================================================================================
+    def close(self):
+        self.file.close()
+
+#**********************************************************************************************
+class IndexedGzipFile(object):
+    """
+    indexed_gzip reader loading its access point index from <file>.gzidx when it is not older than
+    the file. With saveIndex the index is saved there on close when it was built or has grown.
+    """
+    def __init__(self, fileName, spacing=None, saveIndex=False):
+        self.inp = indexed_gzip.IndexedGzipFile(fileName, spacing=spacing or GzipAccessPoints.spacing)
+        self.name = fileName
+        self.indexName = fileName + '.gzidx'
+        self.saveIndex = saveIndex
+        self.imported = None            # seek point count of the loaded index
+        if os.path.exists(self.indexName) and os.path.getmtime(self.indexName) >= os.path.getmtime(fileName):
+            self.inp.import_index(self.indexName)
+            self.imported = self.seekPoints()
+        self.read, self.tell, self.seek = self.inp.read, self.inp.tell, self.inp.seek
+
+    #==============================================================================================
+    def seekPoints(self):
+        """
+        Returns the number of access points built so far, None when indexed_gzip cannot tell
+        """
+        seekPoints = getattr(self.inp, 'seek_points', None)
+        return len(list(seekPoints())) if seekPoints else None
+
+    #==============================================================================================
+    def close(self):
+        if self.saveIndex:
+            points = self.seekPoints()
+            if points is None:
+                changed = self.imported is None     # cannot count, save when nothing was loaded
+            else:
+                changed = points > (self.imported or 0)
+            if changed:
+                try:
+                    self.inp.export_index(self.indexName)
+                except (IOError, OSError):
+                    pass                            # read only archive, the index is rebuilt next time
+        self.inp.close()
+
+#**********************************************************************************************
+def openGzip(fileName, spacing=None, saveIndex=False):
+    """
+    Opens a gzip file for reading with fast seeks to any offset, through indexed_gzip when it is
+    installed (saveIndex keeps its index for the next reader, see IndexedGzipFile), otherwise
+    through in memory access points
+    """
+    if have_indexed_gzip:
+        return BlockReader(IndexedGzipFile(fileName, spacing, saveIndex))
+    return BlockReader(GzipAccessPoints(fileName, spacing))
 
 #**********************************************************************************************
 def readFieldDirect(endian, inp, stdfFmt):
@@ -99,18 +441,21 @@ def readFieldDirect(endian, inp, stdfFmt):
     return val
 
 #**********************************************************************************************
-def readHeader(inp, recordMap):
+def readHeader(codec, inp, recordMap):
+    buf = ''
     try:
         buf = inp.read(4)
-        length, typ, sub = _unpackHeader(buf)
+        length, typ, sub = codec.unpackHeader(buf)
         return Types.RecordHeader(length, typ, sub, recordMap)
     except Exception:
+        if buf:
+            raise Types.TruncatedRecordException('Record header cut short at %d' % (inp.tell() - len(buf)))
         raise Types.EofException()
     
 #**********************************************************************************************
 def readField(*args):
-    buf, offset, stdfFmt = args[:3]
-    sup, size = stdf2unpack[stdfFmt]
+    codec, buf, offset, stdfFmt = args[:4]
+    sup, size = codec.stdf2unpack[stdfFmt]
     val, = sup(buf, offset)
     return offset, val, offset + size
 
@@ -120,10 +465,10 @@ def readCf(*args):
     Variable length character string:
     string length is stored in another field
     """
-    buf, offset, size = args[:3]
+    codec, buf, offset, size = args[:4]
     if not size:
         return offset, '', offset + 1
-    val, = unpack_from('%s%ds' % (_endian, size), buf, offset)
+    val, = unpack_from('%ds' % size, buf, offset)
     return offset, val, offset + size
 
 #**********************************************************************************************
@@ -132,11 +477,14 @@ def readCn(*args):
     Variable length character string:
     first byte = unsigned count of bytes to follow (maximum of 255 bytes)
     """
-    buf, offset = args[:2]
+    codec, buf, offset = args[:3]
     size, = unpack_from('B', buf, offset)
     if not size:
         return offset, '', offset + 1
-    val, = unpack_from('%s%ds' % (_endian, size), buf, offset+1)
+    val, = unpack_from('%ds' % size, buf, offset+1)
+    if codec.strings is not None:
+        codec.strings.lookups += 1
+        val = codec.strings[val]
     return offset, val, offset + 1 + size
 
 #**********************************************************************************************
@@ -145,11 +493,11 @@ def readSn(*args):
     Variable length character string:
     first two bytes = unsigned count of bytes to follow (maximum of 65535 bytes)
     """
-    buf, offset = args[:2]
-    size, = unpack_from('H', buf, offset)
+    codec, buf, offset = args[:3]
+    size, = codec.stdf2unpack['U2'][0](buf, offset)
     if not size:
         return offset, '', offset + 2
-    val, = unpack_from('%s%ds' % (_endian, size), buf, offset+2)
+    val, = unpack_from('%ds' % size, buf, offset+2)
     return offset, val, offset + 2 + size
 
 #**********************************************************************************************
@@ -159,9 +507,9 @@ def readBn(*args):
     First byte = unsigned count of bytes to follow (maximum of 255 bytes).
     First data item in least significant bit of the second byte of the array (first byte is count.)
     """
-    buf, offset = args[:2]
+    codec, buf, offset = args[:3]
     size, = unpack_from('B', buf, offset)
-    bn = unpack_from('%s%s' % (_endian, 'B' * size), buf, offset+1)
+    bn = unpack_from('B' * size, buf, offset+1)
     return offset, bn, offset + 1 + size
 
 #**********************************************************************************************
@@ -172,17 +520,17 @@ def readDn(*args):
     First data item in least significant bit of the third byte of the array (first two bytes are count).
     Unused bits at the high order end of the last byte must be zero.
     """
-    buf, offset = args[:2]
-    bits, = unpack_from('H', buf, offset)
+    codec, buf, offset = args[:3]
+    bits, = codec.stdf2unpack['U2'][0](buf, offset)
     size = bits / 8
     if bits % 8 > 0:
         size += 1
-    dn = unpack_from('%s%s' % (_endian, 'B' * size), buf, offset+2)
+    dn = unpack_from('B' * size, buf, offset+2)
     return offset, dn, offset + 2 + size
 
 #**********************************************************************************************
 vnReadMap = {
-     #0: ('B0', lambda *args: (args[1], record.parser.inp.read(1), args[1]+1)),
+     #0: ('B0', lambda *args: (args[2], record.parser.inp.read(1), args[2]+1)),
      1: ('U1', readField),
      2: ('U2', readField),
      3: ('U4', readField),
@@ -194,24 +542,24 @@ vnReadMap = {
     10: ('Cn', readCn),
     11: ('Bn', readBn),
     12: ('Dn', readDn),
-    13: ('N1', lambda *args: readField(args[0], args[1], 'U1'))
+    13: ('N1', lambda *args: readField(args[0], args[1], args[2], 'U1'))
 }
 
 GEN_DATA_ = 'GEN_DATA_'
 
-def readVn(record, verify):
+def readVn(codec, record, verify):
     offset, buf = 0, record.buffer
     if verify:
         record.original['FLD_CNT'] = (offset, 2)
-    _, vln, offset = readField(buf, offset, 'U2')      # extracts the data field count FLD_CNT
+    _, vln, offset = readField(codec, buf, offset, 'U2')      # extracts the data field count FLD_CNT
     fm = [None] * (vln+1)
     fm[0] =('FLD_CNT', 'U2', None)
     vn = [vln] * (vln+1)
-    b0Pad = ('B0', lambda *args: (args[1], record.parser.inp.read(1), args[1]+1))
+    b0Pad = ('B0', lambda *args: (args[2], record.parser.inp.read(1), args[2]+1))
     for i in range(vln):
-        rln, fldType, offset = readField(buf, offset, 'B1')
+        rln, fldType, offset = readField(codec, buf, offset, 'B1')
         fmt, fieldReader = vnReadMap.get(fldType, b0Pad)
-        _, genData, offset = fieldReader(buf, offset, fmt)
+        _, genData, offset = fieldReader(codec, buf, offset, fmt)
         if fmt == 'B0':
             continue
         vName = '%s%d' % (GEN_DATA_, i)
@@ -245,8 +593,9 @@ unpackMap = {
 }
 
 # **********************************************************************************************
-def readArray(buf, offset, arrayCnt, arrayFmt, itemNdx, itemSize):
+def readArray(codec, buf, offset, arrayCnt, arrayFmt, itemNdx, itemSize):
     """
+    Fixed width items are unpacked in one call, variable length items one at a time
     """
     rln = offset
     if itemNdx is None:
@@ -254,56 +603,72 @@ def readArray(buf, offset, arrayCnt, arrayFmt, itemNdx, itemSize):
     else:
         arrayFmt = 'U%d' % itemSize if arrayFmt[0] == 'U' else itemSize  # Uf -> U1 | U2 | U4 | U8
         fieldReader = unpackMap.get(arrayFmt, readCf)  # Cf is passed itemSize in last parameter
+    if arrayFmt in _stdf2struct:
+        arrayReader, size = codec.arrayUnpacker(arrayFmt, arrayCnt)
+        return rln, arrayReader(buf, offset), offset + size
     arr = [None] * arrayCnt
     for i in range(arrayCnt):
-        _, arr[i], offset = fieldReader(buf, offset, arrayFmt)
+        _, arr[i], offset = fieldReader(codec, buf, offset, arrayFmt)
     return rln, arr, offset
 
 # **********************************************************************************************
-def readNibbleArray(buf, offset, arrayCnt, arrayFmt):
+def readNibbleArray(codec, buf, offset, arrayCnt, arrayFmt):
     """
+    Unpacks all the bytes at once, then interleaves the low and high nibbles
     """
     rln = offset
     numReads = arrayCnt / 2 + arrayCnt % 2
-    arr = []
-    fieldReader = unpackMap[arrayFmt]
-    for i in range(numReads):
-        _, val, offset = fieldReader(buf, offset, 'U1')
-        arr.append(val & 0xF)
-        if len(arr) < arrayCnt:
-            arr.append(val >> 4)
-    return rln, arr, offset
+    byteReader, size = codec.arrayUnpacker('U1', numReads)
+    data = byteReader(buf, offset)
+    if codec.numpyArrays:
+        arr = numpy.empty(numReads * 2, numpy.uint8)
+        arr[0::2] = data & 0xF
+        arr[1::2] = data >> 4
+    else:
+        arr = [0] * (numReads * 2)
+        arr[0::2] = [val & 0xF for val in data]
+        arr[1::2] = [val >> 4 for val in data]
+    return rln, arr[:arrayCnt], offset + size
 
 #**********************************************************************************************
-def decodeValues(record, verify=False):
+def decodeFields(codec, record, fields, oft=0, verify=False):
+    """
+    Interprets the given field specs against the record buffer starting at offset oft
+    Returns the offset following the last field, None if decoding was cut short
+    """
     name = None
     try:
-        oft, mxLen, buf, vals, orig = 0, len(record.buffer), record.buffer, record.values, record.original
-        for name, fmt, missing, index, arrayFmt, arrayNdx, itemNdx in record.fields():
+        mxLen, buf, vals, orig = len(record.buffer), record.buffer, record.values, record.original
+        stdf2unpack, strings = codec.stdf2unpack, codec.strings
+        for name, fmt, missing, index, arrayFmt, arrayNdx, itemNdx in fields:
             if oft >= mxLen:
                 vals[index] = missing
                 continue
             if fmt == 'Vn':
-                readVn(record, verify)
+                readVn(codec, record, verify)
                 continue
             rln = oft
             if arrayFmt:
                 if arrayFmt == 'N1':
-                    _, vals[index], oft = readNibbleArray(buf, oft, vals[arrayNdx], arrayFmt)
+                    _, vals[index], oft = readNibbleArray(codec, buf, oft, vals[arrayNdx], arrayFmt)
                 else:
-                    _, vals[index], oft = readArray(buf, oft, vals[arrayNdx], arrayFmt, itemNdx, vals[itemNdx or 0])
+                    _, vals[index], oft = readArray(codec, buf, oft, vals[arrayNdx], arrayFmt, itemNdx, vals[itemNdx or 0])
             elif fmt == 'Cn':
                 size = stdf2unpack['U1'][0](buf, oft)[0]     # inline of readCn
-                vals[index] = unpack_from('%s%ds' % (_endian, size), buf, oft+1)[0] if size else ''
+                vals[index] = unpack_from('%ds' % size, buf, oft+1)[0] if size else ''
+                if size and strings is not None:
+                    strings.lookups += 1
+                    vals[index] = strings[vals[index]]
                 oft += (size + 1)
             elif fmt[-1] in 'nf':
-                _, vals[index], oft = unpackMap[fmt](buf, oft, fmt)
+                _, vals[index], oft = unpackMap[fmt](codec, buf, oft, fmt)
             else:
                 sup, size = stdf2unpack[fmt]        # inline of readField
                 vals[index] = sup(buf, oft)[0]
                 oft += size
             if verify:
                 orig[name] = (rln, oft - rln)
+        return oft
     except Types.EndOfRecordException:
         pass
     except error, err:
@@ -313,6 +678,284 @@ def decodeValues(record, verify=False):
         print name, record
         raise
 
+#**********************************************************************************************
+_FIXED, _CN, _FIELD = range(3)
+_unpackCount = Struct('B').unpack_from
+
+def compileDecoder(fields, endian):
+    """
+    Builds a decoder specialised to a run of record fields and one byte order.
+    Contiguous fixed width fields are merged into a single precompiled Struct,
+    variable length fields are handled one at a time behind them.
+    The decoder starts at buffer offset oft and returns the offset following
+    the last field, None if decoding was cut short.
+    Returns None when the field map can only be interpreted (Vn fields)
+    """
+    steps = []
+    for pos, fld in enumerate(fields):
+        if fld.format == 'Vn':
+            return None
+        rest = fields[pos:]     # what the interpreter picks up when a record is cut short
+        if not fld.arrayFmt and fld.format in _stdf2struct:
+            if steps and steps[-1][0] == _FIXED:
+                _, fmt, first, _, rest = steps.pop()
+                fmt += _stdf2struct[fld.format]
+            else:
+                fmt, first = _stdf2struct[fld.format], fld.index
+            steps.append((_FIXED, fmt, first, fld.index + 1, rest))
+        elif not fld.arrayFmt and fld.format == 'Cn':
+            steps.append((_CN, None, fld.index, fld.index + 1, rest))
+        else:
+            steps.append((_FIELD, None, fld.index, fld.index + 1, rest))
+    for i, (kind, fmt, first, last, rest) in enumerate(steps):
+        if kind == _FIXED:
+            fixed = Struct(endian + fmt)
+            steps[i] = (kind, (fixed.unpack_from, fixed.size), first, last, rest)
+    steps = tuple(steps)
+
+    def decoder(codec, record, oft=0):
+        buf, vals, strings = record.buffer, record.values, codec.strings
+        mxLen = len(buf)
+        for kind, reader, first, last, rest in steps:
+            if oft >= mxLen:
+                for fld in rest:
+                    vals[fld.index] = fld.missing
+                return oft
+            if kind == _FIXED:
+                unpacker, size = reader
+                if oft + size > mxLen:          # truncated record, let the interpreter sort it out
+                    return decodeFields(codec, record, rest, oft)
+                vals[first:last] = unpacker(buf, oft)
+                oft += size
+            elif kind == _CN:
+                size = _unpackCount(buf, oft)[0]     # inline of readCn
+                if oft + 1 + size > mxLen:
+                    return decodeFields(codec, record, rest, oft)
+                if not size:
+                    vals[first] = ''
+                elif strings is None:
+                    vals[first] = buf[oft+1:oft+1+size]
+                else:
+                    strings.lookups += 1
+                    vals[first] = strings[buf[oft+1:oft+1+size]]
+                oft += (size + 1)
+            else:
+                oft = decodeFields(codec, record, rest[:1], oft)
+                if oft is None:
+                    return
+        return oft
+    return decoder
+
+def compileDecoders(fields):
+    """
+    Returns the compiled decoders of a field map keyed by byte order
+    """
+    decoders = dict()
+    for endian in '<>':
+        decoder = compileDecoder(fields, endian)
+        if decoder:
+            decoders[endian] = decoder
+    return decoders
+
+#**********************************************************************************************
+def fieldTest(name, condition):
+    """
+    A number (float included) matches by equality, a callable is called with the value,
+    a container (not a string, the fields are numbers) by membership
+    """
+    if isinstance(condition, Number):
+        return lambda value: value == condition
+    if callable(condition):
+        return condition
+    if hasattr(condition, '__contains__') and not isinstance(condition, basestring):
+        return lambda value: value in condition
+    raise ValueError('%s: %r is not a number, a callable or a container' % (name, condition))
+
+def compileFilter(fields, conditions, endian):
+    """
+    Builds a test of the raw body of a record against {field name: condition} (see fieldTest),
+    the fields must lie in the fixed width run at the start of the record.
+    The test has the attribute size, the body bytes it needs.
+    """
+    fmt, columns = '', dict()
+    for fld in fields:
+        if fld.arrayFmt or fld.format not in _stdf2struct:
+            break
+        columns[fld.name] = len(fmt)
+        fmt += _stdf2struct[fld.format]
+    for name in conditions:
+        if name not in columns:
+            raise ValueError('%s is not at a fixed offset' % name)
+    last = max(columns[name] for name in conditions)
+    unpacker = Struct(endian + fmt[:last + 1])
+    unpack = unpacker.unpack_from
+    checks = tuple((columns[name], fieldTest(name, condition)) for name, condition in conditions.items())
+
+    def accept(buf):
+        values = unpack(buf)
+        for column, test in checks:
+            if not test(values[column]):
+                return False
+        return True
+    accept.size = unpacker.size
+    return accept
+
+#**********************************************************************************************
+def decodeValues(codec, record, verify=False):
+    """
+    Dispatches to the decoder compiled for the record class and codec byte order,
+    the field map is interpreted when verifying or when no decoder is available
+    """
+    decoder = None if verify else record._decoders.get(codec.endian)
+    if verify and record.original is None:
+        record.original = dict()
+    if decoder is None:
+        decodeFields(codec, record, record.fields(), 0, verify)
+    else:
+        decoder(codec, record)
+
+#**********************************************************************************************
+class LazyValues(list):
+    """
+    Record values decoded up to a field position, the fields after it are decoded
+    the first time they are accessed. Behaves as the fully decoded list otherwise,
+    changing it decodes all the fields first.
+    C code reading the list storage directly (''.join, ujson.dumps, PySequence_Fast)
+    sees None for the fields not decoded yet: pass it decodeAll() or list(values).
+    """
+    __slots__ = ['codec', 'record', 'pos', 'oft']
+
+    def __init__(self, codec, record):
+        list.__init__(self, record.values)
+        self.codec = codec
+        self.record = record
+        self.pos = len(self)        # everything reads as decoded while the decoders run
+        self.oft = 0
+
+    #==============================================================================================
+    def decodeTo(self, stop):
+        record, start, oft = self.record, self.pos, self.oft
+        self.pos = len(self)
+        if oft is not None:
+            decoders, key = record._decoders, (self.codec.endian, start, stop)
+            if key not in decoders:
+                decoders[key] = compileDecoder(record.fields()[start:stop], self.codec.endian)
+            oft = decoders[key](self.codec, record, oft)
+        if stop < len(self) and oft is not None:
+            self.pos, self.oft = stop, oft
+        else:
+            self.codec = self.record = None
+
+    #==============================================================================================
+    def decodeAll(self):
+        if self.record is not None and self.pos < len(self):      # not while the decoders run
+            self.decodeTo(len(self))
+        return self
+
+    #==============================================================================================
+    def __getitem__(self, index):
+        if self.record is not None:
+            if isinstance(index, slice) or index < 0:
+                self.decodeTo(len(self))
+            elif index >= self.pos:
+                self.decodeTo(index + 1)
+        return list.__getitem__(self, index)
+
+    def __getslice__(self, i, j):
+        return list.__getslice__(self.decodeAll(), i, j)
+
+    def __iter__(self):
+        return list.__iter__(self.decodeAll())
+
+    def __reversed__(self):
+        return list.__reversed__(self.decodeAll())
+
+    def __contains__(self, value):
+        return list.__contains__(self.decodeAll(), value)
+
+    def __eq__(self, other):
+        return list.__eq__(self.decodeAll(), other)
+
+    def __ne__(self, other):
+        return list.__ne__(self.decodeAll(), other)
+
+    def __add__(self, other):
+        return list.__add__(self.decodeAll(), other)
+
+    def __repr__(self):
+        return list.__repr__(self.decodeAll())
+
+    def index(self, *args):
+        return list.index(self.decodeAll(), *args)
+
+    def count(self, value):
+        return list.count(self.decodeAll(), value)
+
+    def __setitem__(self, index, value):
+        list.__setitem__(self.decodeAll(), index, value)
+
+    def __setslice__(self, i, j, values):
+        list.__setslice__(self.decodeAll(), i, j, values)
+
+    def __delitem__(self, index):
+        list.__delitem__(self.decodeAll(), index)
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self.decodeAll(), i, j)
+
+    def __iadd__(self, other):
+        return list.__iadd__(self.decodeAll(), other)
+
+    def __imul__(self, count):
+        return list.__imul__(self.decodeAll(), count)
+
+    def append(self, value):
+        list.append(self.decodeAll(), value)
+
+    def extend(self, values):
+        list.extend(self.decodeAll(), values)
+
+    def insert(self, index, value):
+        list.insert(self.decodeAll(), index, value)
+
+    def pop(self, *args):
+        return list.pop(self.decodeAll(), *args)
+
+    def remove(self, value):
+        list.remove(self.decodeAll(), value)
+
+    def reverse(self):
+        list.reverse(self.decodeAll())
+
+    def sort(self, *args, **kwargs):
+        list.sort(self.decodeAll(), *args, **kwargs)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(list(self), memo)
+
+#**********************************************************************************************
+def decodeLazy(codec, record, count):
+    """
+    Decodes the first count fields of the record now, the remaining fields on access
+    """
+    decoders, key = record._decoders, (codec.endian, count)
+    if codec.endian not in decoders:        # the field map can only be interpreted
+        return decodeValues(codec, record)
+    if key not in decoders:
+        decoders[key] = compileDecoder(record.fields()[:count], codec.endian)
+    decoder = decoders[key]
+    record.values = vals = LazyValues(codec, record)
+    vals.oft = decoder(codec, record)
+    vals.pos = count
+    if count >= len(vals) or vals.oft is None:
+        vals.codec = vals.record = None
+
 #**********************************************************************************************
 #**********************************************************************************************
 #**********************************************************************************************
@@ -336,19 +979,19 @@ def encodeGdr(stringData):
     return fmt, cst(stringData)
     
 #**********************************************************************************************
-def packRecord(record, encodedValues):
+def packRecord(codec, record, encodedValues):
     packedValues = ''.join(encodedValues)
-    return _packHeader(len(packedValues), record.typ, record.sub) + packedValues
+    return codec.packHeader(len(packedValues), record.typ, record.sub) + packedValues
 
 #**********************************************************************************************
-def packField(value, stdfFmt):
+def packField(codec, value, stdfFmt):
     try:
-        return stdf2pack[stdfFmt][0](value)
+        return codec.stdf2pack[stdfFmt][0](value)
     except Exception, err:
         raise Types.EndOfRecordException('%s' % err)
 
 #**********************************************************************************************
-def packCf(value, siz):
+def packCf(codec, value, siz):
     """
     Variable length character string: count of bytes stored in another field
     """
@@ -372,14 +1015,14 @@ def packCn(value):
         raise Types.EndOfRecordException('%s' % err)
 
 #**********************************************************************************************
-def packSn(value):
+def packSn(codec, value):
     """
     Variable length character string:
     first two bytes = unsigned count of bytes to follow (maximum of 65535 bytes)
     """
     try:
         siz = len(value)
-        return pack('H%ds' % siz, siz, value)
+        return pack('%sH%ds' % (codec.endian, siz), siz, value)
     except Exception, err:
         raise Types.EndOfRecordException('%s' % err)
 
@@ -397,7 +1040,7 @@ def packBn(value):
         raise Types.EndOfRecordException('%s' % err)
 
 #**********************************************************************************************
-def packDn(value):
+def packDn(codec, value):
     """
     Variable length bit-encoded field:
     First two bytes = unsigned count of bits to follow (maximum of 65,535 bits).
@@ -406,32 +1049,32 @@ def packDn(value):
     """
     try:
         siz = len(value)
-        return pack('H%dB' % siz, siz * 8, *value)       # the size is in bits, so 8x bytes
+        return pack('%sH%dB' % (codec.endian, siz), siz * 8, *value)       # the size is in bits, so 8x bytes
     except Exception, err:
         raise Types.EndOfRecordException('%s' % err)
 
 #**********************************************************************************************
 vnPackMap = {
-    'B0': ( 1, lambda value: packField(value, 'U1')),
-    'U1': ( 1, lambda value: packField(value, 'U1')),
-    'U2': ( 2, lambda value: packField(value, 'U2')),
-    'U4': ( 3, lambda value: packField(value, 'U4')),
-    'I1': ( 4, lambda value: packField(value, 'I1')),
-    'I2': ( 5, lambda value: packField(value, 'I2')),
-    'I4': ( 6, lambda value: packField(value, 'I4')),
-    'R4': ( 7, lambda value: packField(value, 'R4')),
-    'R8': ( 8, lambda value: packField(value, 'R8')),
-    'Cn': (10, lambda value: packCn(value)),
-    'Bn': (11, lambda value: packBn(value)),
-    'Dn': (12, lambda value: packDn(value)),
-    'N1': (13, lambda value: packField(value, 'U1'))
+    'B0': ( 1, lambda codec, value: packField(codec, value, 'U1')),
+    'U1': ( 1, lambda codec, value: packField(codec, value, 'U1')),
+    'U2': ( 2, lambda codec, value: packField(codec, value, 'U2')),
+    'U4': ( 3, lambda codec, value: packField(codec, value, 'U4')),
+    'I1': ( 4, lambda codec, value: packField(codec, value, 'I1')),
+    'I2': ( 5, lambda codec, value: packField(codec, value, 'I2')),
+    'I4': ( 6, lambda codec, value: packField(codec, value, 'I4')),
+    'R4': ( 7, lambda codec, value: packField(codec, value, 'R4')),
+    'R8': ( 8, lambda codec, value: packField(codec, value, 'R8')),
+    'Cn': (10, lambda codec, value: packCn(value)),
+    'Bn': (11, lambda codec, value: packBn(value)),
+    'Dn': (12, lambda codec, value: packDn(codec, value)),
+    'N1': (13, lambda codec, value: packField(codec, value, 'U1'))
 }
 
 # **********************************************************************************************
-def packVn(value, stdfFmt):
+def packVn(codec, value, stdfFmt):
     vnFmt, fieldPacker = vnPackMap[stdfFmt]
-    genData = packField(vnFmt, 'B1')
-    genData += fieldPacker(value)
+    genData = packField(codec, vnFmt, 'B1')
+    genData += fieldPacker(codec, value)
     return genData
 
 #**********************************************************************************************
@@ -448,17 +1091,17 @@ packMap = {
     'I8': packField,
     'R4': packField,
     'R8': packField,
-    'N1': lambda value, fmt: packField(value, 'U1'),
+    'N1': lambda codec, value, fmt: packField(codec, value, 'U1'),
     'Cf': packCf,
-    'Cn': lambda value, fmt: packCn(value),
-    'Sn': lambda value, fmt: packSn(value),
-    'Bn': lambda value, fmt: packBn(value),
-    'Dn': lambda value, fmt: packDn(value),
+    'Cn': lambda codec, value, fmt: packCn(value),
+    'Sn': lambda codec, value, fmt: packSn(codec, value),
+    'Bn': lambda codec, value, fmt: packBn(value),
+    'Dn': lambda codec, value, fmt: packDn(codec, value),
     'Vn': packVn,
 }
 
 # **********************************************************************************************
-def packArray(record, index, arrayFmt, itemNdx):
+def packArray(codec, record, index, arrayFmt, itemNdx):
     """
     """
     if itemNdx is None:
@@ -470,11 +1113,11 @@ def packArray(record, index, arrayFmt, itemNdx):
     values = record.values[index]
     arr = [''] * len(values)
     for i, value in enumerate(values):
-        arr[i] = fieldPacker(value, arrayFmt)
+        arr[i] = fieldPacker(codec, value, arrayFmt)
     return ''.join(arr), len(arr)
 
 # **********************************************************************************************
-def packNibbleArray(record, index, arrayFmt):
+def packNibbleArray(codec, record, index, arrayFmt):
     """
     """
     values = record.values[index]
@@ -485,12 +1128,12 @@ def packNibbleArray(record, index, arrayFmt):
         val = values[i] & 0xF
         if i + 1 < numValues:
             val |= values[i + 1] << 4
-        d = fieldPacker(val, arrayFmt)
+        d = fieldPacker(codec, val, arrayFmt)
         arr.append(d)
     return ''.join(arr), numValues
 
 # **********************************************************************************************
-def encodeMissingField(record, name, fmt, missing, index, arrayFmt, processedData):
+def encodeMissingField(codec, record, name, fmt, missing, index, arrayFmt, processedData):
     if missing is None:
         raise Types.EndOfRecordException('Required data missing from %s.%s' % (record.name, name))
     if isinstance(missing, tuple):
@@ -499,59 +1142,170 @@ def encodeMissingField(record, name, fmt, missing, index, arrayFmt, processedDat
         if arrayFmt:
             record.values[index] = val = []
         else:
-            record.values[index] = val = packMap[fmt](defaultDataMap[fmt], fmt)
+            record.values[index] = val = packMap[fmt](codec, defaultDataMap[fmt], fmt)
         record.values[flagField.index] |= (flagField.missing ^ mask)
-        processedData[flagField.index] = packMap[flagField.format](record.values[flagField.index], flagField.format)
+        processedData[flagField.index] = packMap[flagField.format](codec, record.values[flagField.index], flagField.format)
     else:
-        record.values[index] = val = packMap[fmt](missing, fmt)
+        record.values[index] = val = packMap[fmt](codec, missing, fmt)
     return val
 
 # **********************************************************************************************
-def encodeArrayField(record, index, arrayFmt, arrayNdx, itemNdx, processedData):
+def encodeArrayField(codec, record, index, arrayFmt, arrayNdx, itemNdx, processedData):
     if arrayFmt == 'N1':
-        val, newCount = packNibbleArray(record, index, arrayFmt)
+        val, newCount = packNibbleArray(codec, record, index, arrayFmt)
     else:
-        val, newCount = packArray(record, index, arrayFmt, itemNdx)
+        val, newCount = packArray(codec, record, index, arrayFmt, itemNdx)
     arrayCnt = record.values[arrayNdx]
     if arrayCnt != newCount:
         record.values[arrayNdx] = newCount
         raField = record.field(arrayNdx)
-        processedData[arrayNdx] = packMap[raField.format](newCount, raField.format)
+        processedData[arrayNdx] = packMap[raField.format](codec, newCount, raField.format)
     processedData[index] = val
     
 #**********************************************************************************************
-def encodeRecord(record):
+def undecoded(values):
+    """
+    True when no value is set, the values being compared by identity as NumPy array fields have no truth value
+    """
+    return all(value is None for value in values)
+
+#**********************************************************************************************
+def encodeRecord(codec, record):
     """
     Returns the original buffer if present and all values are None
     """
-    if record.buffer and reduce(lambda x, y: x or y, record.values) is None:
-        return record.buffer
+    if record.buffer and undecoded(record.values):
+        return str(record.buffer)        # the buffer may be a view of a MappedFile
     processedData = [None] * len(record.fieldMap)
-    vals = record.values
+    vals, stdf2pack = record.values, codec.stdf2pack
     for name, fmt, missing, index, arrayFmt, arrayNdx, itemNdx in record.fields():
         try:
             val = vals[index]
             if val is None:
-                processedData[index] = encodeMissingField(record, name, fmt, missing, index, arrayFmt, processedData)
+                processedData[index] = encodeMissingField(codec, record, name, fmt, missing, index, arrayFmt, processedData)
                 continue
             if arrayFmt:
-                encodeArrayField(record, index, arrayFmt, arrayNdx, itemNdx, processedData)
+                encodeArrayField(codec, record, index, arrayFmt, arrayNdx, itemNdx, processedData)
                 continue
             if name.startswith(GEN_DATA_):
-                processedData[index] = packVn(val, fmt) # Gdr constructor prefixes the data with the count of fields
+                processedData[index] = packVn(codec, val, fmt) # Gdr constructor prefixes the data with the count of fields
                 continue
             if fmt == 'Cn':                 # inline of packCn
                 siz = len(val)
                 processedData[index] = pack('B%ds' % siz, siz, str(val[:255]))
             elif fmt[-1] in 'nf':
-                processedData[index] = packMap[fmt](val, fmt)
+                processedData[index] = packMap[fmt](codec, val, fmt)
             else:
                 processedData[index] = stdf2pack[fmt][0](val)
         except Exception, err:
             raise Types.EndOfRecordException('%s: %s-%s' % (err, name, index))
-            
+
     return processedData
 
+#**********************************************************************************************
+_ARRAY, _NIBBLES = 3, 4
+
+def compileEncoder(fields, endian):
+    """
+    Builds a packer specialised to one record field map and byte order, the mirror of compileDecoder.
+    The packer appends the record body to a bytearray and returns True, or returns False
+    leaving the bytearray untouched when the record needs encodeRecord
+    (missing values to fill in, array counts to correct, errors to report).
+    Returns None when the field map can only be interpreted (Vn fields)
+    """
+    steps, arrays = [], []
+    for fld in fields:
+        if fld.format == 'Vn':
+            return None
+        if fld.arrayFmt:
+            arrays.append((fld.index, fld.arrayNdx))
+            if fld.arrayFmt == 'N1':
+                steps.append((_NIBBLES, fld, fld.index, fld.index + 1))
+            elif fld.itemNdx is None and fld.arrayFmt in _stdf2struct:
+                steps.append((_ARRAY, _stdf2struct[fld.arrayFmt], fld.index, fld.index + 1))
+            else:
+                steps.append((_FIELD, fld, fld.index, fld.index + 1))
+        elif fld.format in _stdf2struct:
+            if steps and steps[-1][0] == _FIXED:
+                _, fmt, first, _ = steps.pop()
+                fmt += _stdf2struct[fld.format]
+            else:
+                fmt, first = _stdf2struct[fld.format], fld.index
+            steps.append((_FIXED, fmt, first, fld.index + 1))
+        elif fld.format == 'Cn':
+            steps.append((_CN, fld, fld.index, fld.index + 1))
+        else:
+            steps.append((_FIELD, fld, fld.index, fld.index + 1))
+    for i, (kind, fmt, first, last) in enumerate(steps):
+        if kind == _FIXED:
+            fixed = Struct(endian + fmt)
+            steps[i] = (kind, (fixed.pack_into, '\0' * fixed.size), first, last)
+    steps, arrays = tuple(steps), tuple(arrays)
+
+    def encoder(codec, record, out):
+        vals = record.values
+        if any(value is None for value in vals):
+            return False
+        for index, arrayNdx in arrays:
+            if vals[arrayNdx] != len(vals[index]):
+                return False
+        start = len(out)
+        try:
+            for kind, spec, first, last in steps:
+                if kind == _FIXED:
+                    packInto, blank = spec
+                    oft = len(out)
+                    out += blank
+                    packInto(out, oft, *vals[first:last])
+                elif kind == _CN:                   # inline of packCn
+                    val = str(vals[first])
+                    out.append(len(val))            # ValueError beyond 255
+                    out += val
+                elif kind == _ARRAY:
+                    val = vals[first]
+                    out += pack('%s%d%s' % (endian, len(val), spec), *val)
+                elif kind == _NIBBLES:
+                    out += packNibbleArray(codec, record, first, spec.arrayFmt)[0]
+                elif spec.arrayFmt:
+                    out += packArray(codec, record, first, spec.arrayFmt, spec.itemNdx)[0]
+                else:
+                    out += packMap[spec.format](codec, vals[first], spec.format)
+        except Exception:
+            del out[start:]     # encodeRecord reports it
+            return False
+        return True
+    return encoder
+
+def compileEncoders(fields):
+    """
+    Returns the compiled packers of a field map keyed by byte order
+    """
+    encoders = dict()
+    for endian in '<>':
+        encoder = compileEncoder(fields, endian)
+        if encoder:
+            encoders[endian] = encoder
+    return encoders
+
+#**********************************************************************************************
+def packRecordInto(codec, record, out):
+    """
+    Appends the packed record, header included, to the bytearray out
+    """
+    start = len(out)
+    out += '\0\0\0\0'       # header, filled in once the length is known
+    try:
+        if record.buffer and undecoded(record.values):
+            out += record.buffer
+        else:
+            encoder = record._encoders.get(codec.endian)
+            if encoder is None or not encoder(codec, record, out):
+                out += ''.join(encodeRecord(codec, record))
+        codec.packHeaderInto(out, start, len(out) - start - 4, record.typ, record.sub)
+    except:
+        del out[start:]     # no partial record left behind
+        raise
+
 '''
 The specification of each STDF record has a column labelled Missing/Invalid Data Flag.
 An entry in this column means that the field is optional, and that the value shown is the way to flag the
@@ -18,9 +18,10 @@
 #
 
 from OoHelpers import abstract
+from Pipeline import CheckpointSink
 import V4
 
-class StreamIndexer(object):
+class StreamIndexer(CheckpointSink):
     def before_header(self, dataSource, header):
         self.position = dataSource.inp.tell() - 4
         self.header = header
@@ -40,7 +41,7 @@ class DemoSessionIndexer(SessionIndexer):
     def createSessionID(self): return 0
 
 
-class RecordIndexer(object):
+class RecordIndexer(CheckpointSink):
     def getRecID(self):
         return self.recordId
 
@@ -51,7 +52,7 @@ class RecordIndexer(object):
         self.recordId += 1
 
 
-class MaterialIndexer(object):
+class MaterialIndexer(CheckpointSink):
     def __init__(self):
         self.prr = V4.Prr()
         self.pir = V4.Pir()
@@ -76,9 +77,7 @@ class MaterialIndexer(object):
 
     def before_send(self, dataSource, record):
         if not record.name == 'Prr' and self.closingInsertion:
-            for head in self.currentInsertion.keys():
-                self.currentInsertion[head] = 0
-            self.closingInsertion = False
+            self.closeInsertion()
 
         if record.name == 'Pir':
             headSite = (record.values[self.pir.HEAD_NUM], record.values[self.pir.SITE_NUM])
@@ -91,9 +90,8 @@ class MaterialIndexer(object):
         if record.name == 'Prr':
             headSite = (record.values[self.prr.HEAD_NUM], record.values[self.prr.SITE_NUM])
             self.onPrr(headSite)
-        #elif recType.name == 'Prr':
-        #    headSite = (fields[self.prr.HEAD_NUM], fields[self.prr.SITE_NUM])
-        #    self.onWrr(headSite)
+        elif record.name == 'Wrr':
+            self.onWrr(record.values[record.HEAD_NUM])
 
     def onPir(self, headSite):
         # Increment part count per site
@@ -109,11 +107,18 @@ class MaterialIndexer(object):
         self.currentPart[headSite] = 0
         self.closingInsertion = True
 
+    def closeInsertion(self):
+        # The first record after the Prrs of a touchdown ends the insertion on every head
+        for head in self.currentInsertion.keys():
+            self.currentInsertion[head] = 0
+        self.closingInsertion = False
+
     def onWir(self, headSite):
         if self.currentWafer.get(headSite[0], 0) == 0:
             self.lastWafer += 1
             self.currentWafer[headSite[0]] = self.lastWafer
 
-    #def onWrr(self, headSite):
-    #    self.currentWafer[headSite[0]]
+    def onWrr(self, head):
+        # The next Wir on the head starts a new wafer
+        self.currentWafer[head] = 0
   
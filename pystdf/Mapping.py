@@ -17,19 +17,76 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 #
 
+from array import array
+
 from Indexing import StreamIndexer, MaterialIndexer
+from Scanner import OFFSET_TYPECODE
 import V4
 
+NO_ID = -1      # stored for a material id of None
+
+class RecordList(object):
+    "List-like view of record type codes (typ << 8 | sub), an empty record of the type per item"
+    def __init__(self, codes):
+        self.codes = codes
+        self.empty = dict()     # code to the record handed out for it
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, ndx):
+        if isinstance(ndx, slice):
+            return [self[i] for i in xrange(*ndx.indices(len(self)))]
+        code = self.codes[ndx]
+        if code not in self.empty:
+            self.empty[code] = V4.recordByType(code >> 8, code & 0xff)
+        return self.empty[code]
+
+    def __iter__(self):
+        return (self[ndx] for ndx in xrange(len(self)))
+
+class IdList(object):
+    "List-like wrapper of an array('i') of material ids, NO_ID reading as None"
+    def __init__(self, ids=None):
+        self.ids = ids if ids is not None else array('i')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, ndx):
+        if isinstance(ndx, slice):
+            return [None if value == NO_ID else value for value in self.ids[ndx]]
+        value = self.ids[ndx]
+        return None if value == NO_ID else value
+
+    def __iter__(self):
+        return (None if value == NO_ID else value for value in self.ids)
+
+    def append(self, value):
+        self.ids.append(NO_ID if value is None else value)
+
 class StreamMapper(StreamIndexer):
+    """
+    Offset and record type of every record, in arrays: indexes is an array of offsets,
+    records (also types) gives an empty record of the type of each record
+    """
     def __init__(self):
-        self.indexes = []
-        self.records = []
+        self.indexes = array(OFFSET_TYPECODE)
+        self.codes = array('H')
+        self.records = self.types = RecordList(self.codes)
 
     def before_header(self, dataSource, header):
         super(StreamMapper, self).before_header(dataSource, header)
         self.indexes.append(self.position)
-        rec = V4.recordByType(self.header.typ, self.header.sub)
-        self.records.append(rec)
+        self.codes.append(header.typ << 8 | header.sub)
+
+    @classmethod
+    def fromIndex(cls, index):
+        "A mapper filled from a Sidecar.FileIndex instead of a parse"
+        mapper = cls()
+        mapper.indexes.extend(index.offsets)
+        mapper.codes.extend(typ << 8 | sub for typ, sub in zip(index.types, index.subs))
+        return mapper
 
 class MaterialMapper(MaterialIndexer):
     indexed = {'Wir', 'Wrr', 'Pir', 'Prr', 'Ptr', 'Mpr', 'Ftr'}
@@ -37,9 +94,9 @@ class MaterialMapper(MaterialIndexer):
 
     def before_begin(self, dataSource):
         MaterialIndexer.before_begin(self, dataSource)
-        self.waferIds = []
-        self.insertionIds = []
-        self.partIds = []
+        self.waferIds = IdList()
+        self.insertionIds = IdList()
+        self.partIds = IdList()
 
     def before_send(self, dataSource, record):
         MaterialIndexer.before_send(self, dataSource, record)
@@ -57,6 +114,15 @@ class MaterialMapper(MaterialIndexer):
             self.insertionIds.append(None)
             self.partIds.append(None)
 
+    @classmethod
+    def fromIndex(cls, index):
+        "A mapper filled from a Sidecar.FileIndex instead of a parse"
+        mapper = cls()
+        mapper.waferIds = IdList(array('i', index.waferIds))
+        mapper.insertionIds = IdList(array('i', index.insertionIds))
+        mapper.partIds = IdList(array('i', index.partIds))
+        return mapper
+
 #*******************************************************************************************************************
 if __name__ == "__main__":
     from Parse import process_file
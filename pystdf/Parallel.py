@@ -0,0 +1,179 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+"""
+Parses one uncompressed file in a pool of processes.
+
+The record headers are scanned and the file is cut into chunks starting at a Pir with no part open,
+so every part is parsed whole by one worker. Each worker parses its chunk into fresh copies of the
+sinks, so the sinks must be picklable and mergeable: sink.merge(other) folds in the state other
+accumulated over the following chunk, before the complete event. The merged result matches a serial
+run for sinks whose state is made of the records they are sent, as the summarizers'.
+A sink that depends on earlier records, e.g. the Mir or the defaults the first Ptr of a test carries,
+must take them from the context event (before_context/after_context): ahead of its chunk each worker
+replays through it the initial sequence (the records ahead of the first Pir) and the first
+Ptr/Mpr/Ftr of each test met before the chunk. No sink in the package needs it.
+"""
+
+from bisect import bisect_left
+import cPickle
+from multiprocessing import Pool, cpu_count
+from struct import Struct
+
+import IO
+import V4
+import Scanner
+import Parse
+
+PIR, PRR = (5, 10), (5, 20)
+TEST_RECORDS = ((15, 10), (15, 15), (15, 20))     # Ptr, Mpr, Ftr carry their defaults in the first of each test
+
+#**************************************************************************************************
+def mergeable(sinks):
+    """
+    True when every sink can fold in the results of another chunk
+    """
+    return all(hasattr(sink, 'merge') for sink in sinks)
+
+#**************************************************************************************************
+def wantsContext(sinks):
+    """
+    True when a sink takes the records replayed ahead of a chunk
+    """
+    return any(hasattr(sink, 'before_context') or hasattr(sink, 'after_context') for sink in sinks)
+
+#**************************************************************************************************
+def picklable(obj):
+    """
+    True when the sinks or parser options can be sent to the workers, not e.g. a sink with sinks of its own
+    """
+    try:
+        cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL)
+        return True
+    except (cPickle.PicklingError, TypeError):
+        return False
+
+#**************************************************************************************************
+def partBoundaries(index):
+    """
+    Returns the offsets of the Pir records opening a touchdown, where no part is in progress
+    """
+    boundaries, inProgress = [], 0
+    for offset, typ, sub in zip(index.offsets, index.types, index.subs):
+        if (typ, sub) == PIR:
+            if not inProgress:
+                boundaries.append(int(offset))
+            inProgress += 1
+        elif (typ, sub) == PRR and inProgress:
+            inProgress -= 1
+    return boundaries
+
+#**************************************************************************************************
+def splitChunks(boundaries, size, count):
+    """
+    Returns up to count (start, stop) byte ranges covering the file, cut at part boundaries of about even size
+    """
+    starts = [0]
+    for k in range(1, count):
+        ndx = bisect_left(boundaries, size * k // count)
+        if ndx < len(boundaries) and boundaries[ndx] > starts[-1]:
+            starts.append(boundaries[ndx])
+    return zip(starts, starts[1:] + [size])
+
+#**************************************************************************************************
+def contextOffsets(index, data, codec):
+    """
+    Returns the offsets of the initial sequence records and of the first Ptr/Mpr/Ftr of each test
+    """
+    unpackTestNum = Struct(codec.endian + 'I').unpack_from
+    initial, firsts, seen, inInitial = [], [], set(), True
+    for offset, length, typ, sub in zip(index.offsets, index.lengths, index.types, index.subs):
+        if inInitial and (typ, sub) != PIR:
+            initial.append(int(offset))
+            continue
+        inInitial = False
+        if (typ, sub) in TEST_RECORDS and length >= 4:
+            key = (typ, sub, unpackTestNum(data, int(offset) + 4)[0])
+            if key not in seen:
+                seen.add(key)
+                firsts.append(int(offset))
+    return initial, firsts
+
+#**************************************************************************************************
+def parseChunk(args):
+    """
+    Worker: parses one chunk of the file into the sinks and returns them for merging
+    """
+    fileName, blankSinks, start, stop, context, options = args
+    sinks = cPickle.loads(blankSinks)
+    inp = IO.MappedFile(fileName)
+    try:
+        p = Parse.Parser(inp=inp, **options)
+        for sink in sinks:
+            p.addSink(sink)
+        p.begin()
+        for offset in context:
+            inp.seek(offset)
+            header = IO.readHeader(p.codec, inp, V4.RecordRegistrar)
+            record = p.newRecord(V4.RecordRegistrar[(header.typ, header.sub)], header)
+            IO.decodeValues(p.codec, record)
+            p.context(record)
+        inp.seek(start)
+        p.parse_records(stop=stop)
+        return sinks
+    finally:
+        inp.close()
+
+#**************************************************************************************************
+def process_file(fileName, sinks, jobs=None, chunks=None, **options):
+    """
+    Parses the file in jobs processes (one per CPU by default) split into chunks (4 per job by default)
+    and merges the per-chunk results into the given sinks, then sends them the complete event
+    """
+    jobs = jobs or cpu_count()
+    inp = IO.MappedFile(fileName)
+    try:
+        p = Parse.Parser(inp=inp, **options)
+        index = Scanner.scanHeaders(inp, p.codec)
+        initial, firsts = contextOffsets(index, inp.map, p.codec) if wantsContext(sinks) else ([], [])
+        ranges = splitChunks(partBoundaries(index), inp.size, chunks or jobs * 4)
+        del index
+        blankSinks = cPickle.dumps(sinks, cPickle.HIGHEST_PROTOCOL)     # the workers start from the sinks as given
+        tasks = []
+        for start, stop in ranges:
+            context = [] if start == 0 else initial + firsts[:bisect_left(firsts, start)]
+            tasks.append((fileName, blankSinks, start, stop, context, options))
+        for sink in sinks:
+            p.addSink(sink)
+        p.begin()
+        pool = Pool(min(jobs, len(tasks)))
+        try:
+            for chunkSinks in pool.imap(parseChunk, tasks):
+                for sink, chunkSink in zip(sinks, chunkSinks):
+                    sink.merge(chunkSink)
+            pool.close()
+        except Exception, exception:
+            pool.terminate()
+            p.cancel(exception)
+            raise
+        finally:
+            pool.join()
+        p.complete()
+    finally:
+        inp.close()
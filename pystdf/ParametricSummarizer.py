@@ -19,9 +19,10 @@
 
 from SummaryStatistics import SummaryStatistics
 import V4
-from Pipeline import EventSource
+from Pipeline import EventSource, CheckpointSink
 
-class ParametricSummarizer(EventSource):
+class ParametricSummarizer(EventSource, CheckpointSink):
+    recordTypes = ('Ptr', 'Mpr')
     def __init__(self):
         self.ptr = V4.Ptr()
         self.mpr = V4.Mpr()
@@ -52,6 +53,13 @@ class ParametricSummarizer(EventSource):
         elif record.name == 'Mpr':
             self.onMpr(record.values)
 
+    def merge(self, other):
+        """
+        Folds in the results of the following chunk of the file, see Parallel
+        """
+        for key, values in other.rawMap.iteritems():
+            self.rawMap.setdefault(key, []).extend(values)
+
     def onPtr(self, row):
         values = self.rawMap.setdefault((row[self.ptr.SITE_NUM], row[self.ptr.TEST_NUM], 0), [])
         values.append(row[self.ptr.RESULT])
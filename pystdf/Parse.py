@@ -27,6 +27,7 @@ import traceback
 
 import V4
 from Pipeline import DataSource
+import Checkpoint
 import IO
 import Types
 
@@ -56,45 +57,189 @@ summaryRecords = [
     'Tsr',
 ]
 
+compressedFiles = (gzip.GzipFile, bz2.BZ2File)
+
 #**********************************************************************************************
 #**********************************************************************************************
-class Parser(DataSource):
+def wantedCounts(wanted):
+    """
+    Converts a {record name: field names} spec to the count of leading fields to decode per record name
+    """
+    counts = dict()
+    for name, fieldNames in (wanted or {}).items():
+        recType = V4.RecordRegistrar[name]
+        counts[name] = max([getattr(recType, fieldName) + 1 for fieldName in fieldNames] or [0])
+    return counts
+
+#**********************************************************************************************
+def compileFilters(where, endian):
+    """
+    Compiles a {record name: {field name: condition}} filter to the raw body test per record class
+    """
+    filters = dict()
+    for name, conditions in (where or {}).items():
+        recType = V4.RecordRegistrar[name]
+        filters[recType] = IO.compileFilter(recType._fields, conditions, endian)
+    return filters
 
-    def __init__(self, inp=sys.stdin, lazy=None, verify=False):
-        super(Parser, self).__init__(['header'])
+#**********************************************************************************************
+#**********************************************************************************************
+class Parser(DataSource):
+    """
+    lazy names the record types to decode, the others are sent undecoded, or with skipLazy not sent at all.
+    wanted maps record names to the field names needed up front, e.g. {'Ptr': ['TEST_NUM', 'RESULT']}:
+    those records are decoded up to the last wanted field and the remaining fields on access.
+    internStrings shares repeated Cn values (TEST_TXT, UNITS...) between records, see stringStats().
+    recycle reuses one record instance per record class: a record is only valid until the next
+    record of its class is sent, sinks keeping records must keep record.copy().
+    checkpoint names a file that parse() resumes from when it matches the input and saves to every
+    checkpointInterval bytes and at the end of the file (see Checkpoint), unless a sink taking records
+    is not checkpoint-aware: such a parse always starts from the beginning.
+    Records that are not sent (unregistered, left out by skipLazy or consumed by no sink, see
+    DataSource) are seeked past unread (read and dropped from a pipe), the header event still has them.
+    where filters records on the fields at the start of their body before they are read or decoded,
+    e.g. {'Ptr': {'SITE_NUM': 3, 'TEST_NUM': lambda n: 1000 <= n < 2000}, 'Prr': {'SITE_NUM': (3, 4)}}:
+    a number matches by equality, a callable is called with the field value, others by membership.
+    """
+    def __init__(self, inp=sys.stdin, lazy=None, verify=False, numpyArrays=False, wanted=None, internStrings=False,
+                 recycle=False, checkpoint=None, checkpointInterval=256 * 1024 * 1024, skipLazy=False, where=None):
+        super(Parser, self).__init__(['header', 'context'])
+        if isinstance(inp, compressedFiles):
+            inp = IO.BlockReader(inp)   # small reads on a decompressor are expensive
+        self.seekable = IO.seekable(inp)
+        if not self.seekable:
+            inp = IO.BlockReader(inp)   # the FAR and the where filters are looked at in the block read ahead
         self.inp = inp
         self.lazy = lazy
+        self.skipLazy = skipLazy
         self.verify = verify
-        IO.detectEndian(self.inp)
+        self.wanted = wantedCounts(wanted) if not verify else {}
+        self.recordClasses = dict()     # (typ, sub) to the record class, None for the records skipped
+        self.codec = IO.detectEndian(self.inp, numpyArrays, internStrings)
+        self.filters = compileFilters(where, self.codec.endian)
+        self.recycled = dict() if recycle else None     # record class to its reused instance
+        self.checkpoint = checkpoint
+        self.checkpointInterval = checkpointInterval
+
+    #**********************************************************************************************
+    def addSink(self, sink):
+        super(Parser, self).addSink(sink)
+        self.recordClasses = dict()     # the new sink may consume records skipped so far
+
+    #**********************************************************************************************
+    def recordClass(self, key):
+        """
+        Returns the class of the records with header key (typ, sub), None when they are not sent
+        """
+        cls = V4.RecordRegistrar.get(key)
+        if cls is not None:
+            if self.skipLazy and self.lazy and cls.name not in self.lazy and cls.name not in self.wanted:
+                cls = None
+            elif not self.consumed(cls.name):
+                cls = None
+        self.recordClasses[key] = cls
+        return cls
+
+    #**********************************************************************************************
+    def accepted(self, cls, header):
+        """
+        Tests the start of the record body against the where filter of its class, leaving the input
+        at the start of the body. A body too short for the filtered fields fails, a truncated one passes
+        on to be reported when read.
+        """
+        accept = self.filters[cls]
+        size = min(accept.size, header.len)
+        buf = self.inp.read(size)
+        self.inp.seek(-len(buf), 1)
+        if len(buf) < size:
+            return True
+        return size == accept.size and accept(buf)
+
+    #**********************************************************************************************
+    def newRecord(self, cls, header):
+        """
+        Reads the record body into a new instance of cls, or into the reused one when recycling
+        """
+        if self.recycled is None:
+            return cls(header=header, parser=self)
+        record = self.recycled.get(cls)
+        if record is None:
+            record = self.recycled[cls] = cls(header=header, parser=self)
+        else:
+            record.recycle(header, self)
+        return record
+
+    #**********************************************************************************************
+    def stringStats(self):
+        """
+        Returns the hit rate statistics of the Cn intern table, None when not interning
+        """
+        return self.codec.strings.stats() if self.codec.strings is not None else None
 
     #**********************************************************************************************
     def header(self, data):             # This is here so that sinks can intercept the header event
         pass
 
     #**********************************************************************************************
-    def parse_records(self, breakCount=0):
+    def context(self, record):
+        """
+        Sent instead of send() for the records replayed ahead of a chunk of the file parsed in parallel:
+        the initial sequence and the first Ptr/Mpr/Ftr of each test (the one carrying the defaults)
+        """
+        pass
+
+    #**********************************************************************************************
+    def parse_records(self, breakCount=0, stop=None):
+        """
+        stop ends parsing at the first record starting at or beyond that stream offset
+        """
         recordCount = 1
+        checkpointAt = self.inp.tell() + self.checkpointInterval if self.checkpoint else None
         try:
             while recordCount:
-                header = IO.readHeader(self.inp, V4.RecordRegistrar)
+                if stop is not None and self.inp.tell() >= stop:
+                    break
+                if checkpointAt is not None:
+                    boundary = self.inp.tell()
+                    if boundary >= checkpointAt:
+                        Checkpoint.save(self.checkpoint, self)
+                        checkpointAt = boundary + self.checkpointInterval
+                header = IO.readHeader(self.codec, self.inp, V4.RecordRegistrar)
                 self.header(header)
-                if V4.RecordRegistrar.has_key((header.typ, header.sub)):
-                    record = V4.RecordRegistrar[(header.typ, header.sub)](header=header, parser=self)
-                    if not self.lazy or record.name in self.lazy:
-                        IO.decodeValues(record, self.verify)
+                try:
+                    cls = self.recordClasses[(header.typ, header.sub)]
+                except KeyError:
+                    cls = self.recordClass((header.typ, header.sub))
+                if cls in self.filters and not self.accepted(cls, header):
+                    cls = None
+                if cls is not None:
+                    record = self.newRecord(cls, header)
+                    if record.name in self.wanted:
+                        IO.decodeLazy(self.codec, record, self.wanted[record.name])
+                    elif not self.lazy or record.name in self.lazy:
+                        IO.decodeValues(self.codec, record, self.verify)
                     self.send(record)
+                elif self.seekable:
+                    self.inp.seek(header.len, 1)
                 else:
                     self.inp.read(header.len)
                 if breakCount and recordCount > breakCount:
                     break
                 recordCount += 1
+        except Types.TruncatedRecordException:
+            if checkpointAt is not None and self.inp.tell() - boundary < 4:
+                self.inp.seek(boundary)                     # only a partial header, none of it was sent
+                Checkpoint.save(self.checkpoint, self)
         except Types.EofException:
-            pass
+            if self.checkpoint:
+                Checkpoint.save(self.checkpoint, self)     # resumes an appended file after its last record
 
     #**********************************************************************************************
     def parse(self, breakCount=0):
         self.begin()
         try:
+            if self.checkpoint:
+                Checkpoint.resume(self.checkpoint, self)
             self.parse_records(breakCount)
             self.complete()
         except Exception, exception:
@@ -105,15 +250,39 @@ class Parser(DataSource):
 #**********************************************************************************************
 #**********************************************************************************************
 class Reader(object):
-    def __init__(self, fileName, mode="rb", lazy=None):
+    """
+    Pull-based access to the records of a file, one at a time (iteration), by type (records())
+    or in lists of up to size records (batches()).
+    Records of other types than the ones asked for are skipped without being read or decoded.
+    The end of file stops iteration, a truncated record raises Types.TruncatedRecordException.
+    The file stays open until close() (or the Reader is collected), so that seek() and the indexes
+    work after an iteration.
+    seek() moves to a record offset (e.g. from a StreamMapper or fileIndex()), also in gzip files.
+    saveGzipIndex keeps the indexed_gzip index of a .gz file as <file>.gzidx for the next Reader.
+    partRecords() reads the records of one part through the part index (see PartIndex),
+    iter_test() those of one test number through the test index (see TestIndex),
+    waferIndex() maps the dies of each wafer by coordinates (see WaferIndex).
+    """
+    def __init__(self, fileName, mode="rb", lazy=None, numpyArrays=False, mapped=False, wanted=None,
+                 internStrings=False, saveGzipIndex=False):
+        self.fileName = fileName
+        self.parts = None
+        self.tests = None
+        self.wafers = None
         if fileName.endswith('.gz'):
-            self.inp = gzip.open(fileName, mode)
-        elif fileName.endswith('.bz'):
-            self.inp = bz2.BZ2File(fileName, mode)
+            self.inp = IO.openGzip(fileName, saveIndex=saveGzipIndex)     # seekable through access points
+        elif fileName.endswith(('.bz', '.bz2')):
+            self.inp = IO.BlockReader(bz2.BZ2File(fileName, mode))
+        elif mapped:
+            self.inp = IO.MappedFile(fileName)
         else:
             self.inp = open(fileName, mode)
+        self.seekable = IO.seekable(self.inp)
+        if not self.seekable:
+            self.inp = IO.BlockReader(self.inp)     # a named pipe, the FAR is looked at in the block read ahead
         self.lazy = lazy
-        IO.detectEndian(self.inp)
+        self.wanted = wantedCounts(wanted)
+        self.codec = IO.detectEndian(self.inp, numpyArrays, internStrings)
 
     #**********************************************************************************************
     def __iter__(self):
@@ -121,25 +290,155 @@ class Reader(object):
 
     #**********************************************************************************************
     def __del__(self):
-        if self.inp:
-            self.inp.close()
-        
+        self.close()
+
     #**********************************************************************************************
-    def next(self):
-        try:
-            header = IO.readHeader(self.inp, V4.RecordRegistrar)
-            key = (header.typ, header.sub)
-            if V4.RecordRegistrar.has_key(key):
-                record = V4.RecordRegistrar[key](header=header, parser=self)
-                if not self.lazy or record.name in self.lazy:
-                    IO.decodeValues(record)
-                return record
-            else:
-                raise KeyError("Unknown type (%s): Len (%d)" % (key, header.len))
-        except Exception:
+    def close(self):
+        if getattr(self, 'inp', None):     # None once closed or when the open failed
             self.inp.close()
             self.inp = None
+
+    #**********************************************************************************************
+    def tell(self):
+        return self.inp.tell()
+
+    #**********************************************************************************************
+    def seek(self, offset):
+        """
+        Moves to the record starting at offset, gzip files resume from the nearest access point
+        """
+        self.inp.seek(offset)
+
+    #**********************************************************************************************
+    def fileIndex(self, build=True):
+        """
+        Returns the record offsets and material ids of the file from its sidecar index (see Sidecar)
+        """
+        import Sidecar
+        return Sidecar.openIndex(self.fileName, build)
+
+    #**********************************************************************************************
+    def partIndex(self, build=True):
+        """
+        Returns the part index of the file, loaded once from <file>.parts or built (see PartIndex)
+        """
+        if self.parts is None:
+            import PartIndex
+            self.parts = PartIndex.openPartIndex(self.fileName, build)
+        return self.parts
+
+    #**********************************************************************************************
+    def partRecords(self, part, types=None):
+        """
+        Returns the records of a part number (Pir, test records, Prr) whose names are in types,
+        each read and decoded straight from its offset, the others left undecoded
+        """
+        records = []
+        for offset in self.partIndex().offsets(part):
+            self.seek(offset)
+            header = IO.readHeader(self.codec, self.inp, V4.RecordRegistrar)
+            if types is None or header.name in types:
+                records.append(self.decodeRecord(V4.RecordRegistrar[(header.typ, header.sub)], header))
+        return records
+
+    #**********************************************************************************************
+    def waferIndex(self, build=True):
+        """
+        Returns the wafer maps of the file, made once from the part index (see WaferIndex)
+        """
+        if self.wafers is None:
+            import WaferIndex
+            partIndex = self.partIndex(build)
+            if partIndex is not None:
+                self.wafers = WaferIndex.WaferIndex(partIndex)
+        return self.wafers
+
+    #**********************************************************************************************
+    def testIndex(self, build=True):
+        """
+        Returns the test number index of the file, loaded once from <file>.tests or built (see TestIndex)
+        """
+        if self.tests is None:
+            import TestIndex
+            self.tests = TestIndex.openTestIndex(self.fileName, build)
+        return self.tests
+
+    #**********************************************************************************************
+    def iter_test(self, test_num, head=None, site=None):
+        """
+        Yields in file order the Ptr/Mpr/Ftr records of a test number, on any head and site unless given,
+        each read and decoded straight from its offset
+        """
+        for offset in self.testIndex().offsets(test_num, head, site):
+            self.seek(offset)
+            yield self.readRecord()
+
+    #**********************************************************************************************
+    def readRecord(self, types=None):
+        """
+        Returns the next record whose name is in types (any registered record without types),
+        None at the end of the file
+        """
+        if not self.inp:
+            return None
+        while True:
+            try:
+                header = IO.readHeader(self.codec, self.inp, V4.RecordRegistrar)
+            except Types.TruncatedRecordException:
+                raise
+            except Types.EofException:
+                return None             # the file stays open for seek() and the indexes until close()
+            cls = V4.RecordRegistrar.get((header.typ, header.sub))
+            if cls is None or (types is not None and cls.name not in types):
+                if self.seekable:
+                    self.inp.seek(header.len, 1)    # unknown or unwanted, skipped unread
+                else:
+                    self.inp.read(header.len)
+                continue
+            return self.decodeRecord(cls, header)
+
+    #**********************************************************************************************
+    def decodeRecord(self, cls, header):
+        """
+        Reads the body of the record whose header was just read and decodes it as lazy and wanted ask
+        """
+        record = cls(header=header, parser=self)
+        if record.name in self.wanted:
+            IO.decodeLazy(self.codec, record, self.wanted[record.name])
+        elif not self.lazy or record.name in self.lazy:
+            IO.decodeValues(self.codec, record)
+        return record
+
+    #**********************************************************************************************
+    def next(self):
+        record = self.readRecord()
+        if record is None:
             raise StopIteration
+        return record
+
+    #**********************************************************************************************
+    def records(self, types=None):
+        """
+        Yields the records whose names are in types, e.g. reader.records({'Ptr', 'Prr'})
+        """
+        record = self.readRecord(types)
+        while record is not None:
+            yield record
+            record = self.readRecord(types)
+
+    #**********************************************************************************************
+    def batches(self, size=1000, types=None):
+        """
+        Yields lists of up to size records whose names are in types, the last one may be shorter
+        """
+        batch = []
+        for record in self.records(types):
+            batch.append(record)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
 #**********************************************************************************************
 #**********************************************************************************************
@@ -150,20 +449,44 @@ def runDocTests():
         doctest.testmod(extraglobs={'pObj': pObj})
 
 #*******************************************************************************************************************
-def process_file(filename, writers, breakCount=0, lazy=None, verify=False):
+def process_file(filename, writers, breakCount=0, lazy=None, verify=False, mapped=False, wanted=None,
+                 internStrings=False, recycle=False, jobs=1, checkpoint=None, checkpointInterval=256 * 1024 * 1024,
+                 skipLazy=False, where=None):
+    """
+    mapped parses an uncompressed file through a memory map, compressed files ignore it
+    skipLazy leaves out the records lazy does not name, e.g. lazy=summaryRecords for a summary only pass
+    where filters records on their leading fields before decoding, see Parser
+    jobs > 1 parses an uncompressed file in that many processes when all the writers are mergeable
+    and can be pickled (no sinks of their own attached) and where can be pickled (no lambdas), see Parallel,
+    otherwise the file is parsed serially
+    checkpoint is the checkpoint file to resume from and save to (see Parser), True for <filename>.ckpt
+    """
     gzPattern = re.compile('\.g?z', re.I)
     bz2Pattern = re.compile('\.bz2', re.I)
+    if checkpoint is True:
+        checkpoint = filename + '.ckpt' if filename else None
+    if jobs > 1 and filename and not gzPattern.search(filename) and not bz2Pattern.search(filename) \
+            and not breakCount and not verify and not checkpoint:
+        import Parallel
+        if Parallel.mergeable(writers) and Parallel.picklable(writers) and Parallel.picklable(where):
+            Parallel.process_file(filename, writers, jobs, lazy=lazy, wanted=wanted,
+                                  internStrings=internStrings, recycle=recycle, skipLazy=skipLazy,
+                                  where=where)
+            return
     if filename is None:
         f = sys.stdin
     elif gzPattern.search(filename):
-        reopen_fn = lambda: gzip.open(filename, 'rb')
-        f = reopen_fn()
+        f = IO.openGzip(filename)
     elif bz2Pattern.search(filename):
         reopen_fn = lambda: bz2.BZ2File(filename, 'rb')
         f = reopen_fn()
+    elif mapped:
+        f = IO.MappedFile(filename)
     else:
         f = open(filename, 'rb')
-    p = Parser(inp=f, lazy=lazy, verify=verify)
+    p = Parser(inp=f, lazy=lazy, verify=verify, wanted=wanted, internStrings=internStrings, recycle=recycle,
+               checkpoint=checkpoint, checkpointInterval=checkpointInterval, skipLazy=skipLazy,
+               where=where)
     for writer in writers:
         p.addSink(writer)
     p.parse(breakCount=breakCount)
@@ -0,0 +1,174 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+"""
+Random access to single parts: for every part (numbered from 1 in Pir order, as MaterialIndexer does)
+its head, site, wafer, PART_ID, coordinates, bins, the offsets of its Pir and Prr and the offsets of
+its test records. Built in one pass by PartIndexer and saved next to the file as <file>.parts,
+Parse.Reader.partRecords() then reads a part's records straight from their offsets.
+"""
+
+from array import array
+from collections import namedtuple
+
+from Indexing import MaterialIndexer
+from Scanner import OFFSET_TYPECODE
+import Parse
+import Sidecar
+
+SUFFIX = '.parts'
+TEST_RECORDS = ('Ptr', 'Mpr', 'Ftr')
+
+PartInfo = namedtuple('PartInfo', 'head site waferId partId x y hardBin softBin pirOffset prrOffset')
+
+#**************************************************************************************************
+#**************************************************************************************************
+class PartIndex(object):
+    """
+    Per part columns in arrays, a part without its Prr has prrOffset 0 and no test records.
+    The test record offsets of part n are testOffsets[testStarts[n-1]:testStarts[n-1] + testCounts[n-1]].
+    """
+    def __init__(self):
+        self.heads = array('B')
+        self.sites = array('B')
+        self.waferIds = array('i')
+        self.pirOffsets = array(OFFSET_TYPECODE)
+        self.prrOffsets = array(OFFSET_TYPECODE)
+        self.xs = array('h')
+        self.ys = array('h')
+        self.hardBins = array('H')
+        self.softBins = array('H')
+        self.partIds = []
+        self.testStarts = array(OFFSET_TYPECODE)
+        self.testCounts = array('I')
+        self.testOffsets = array(OFFSET_TYPECODE)
+        self.wafers = dict()        # wafer number to the WAFER_ID of its Wir
+
+    #==============================================================================================
+    def __len__(self):
+        return len(self.heads)
+
+    #==============================================================================================
+    def part(self, part):
+        """
+        Returns the PartInfo of a part number
+        """
+        ndx = part - 1
+        return PartInfo(self.heads[ndx], self.sites[ndx], self.waferIds[ndx], self.partIds[ndx],
+                        self.xs[ndx], self.ys[ndx], self.hardBins[ndx], self.softBins[ndx],
+                        int(self.pirOffsets[ndx]), int(self.prrOffsets[ndx]))
+
+    #==============================================================================================
+    def tests(self, part):
+        """
+        Returns the offsets of the test records of a part number
+        """
+        start = int(self.testStarts[part - 1])
+        return [int(offset) for offset in self.testOffsets[start:start + self.testCounts[part - 1]]]
+
+    #==============================================================================================
+    def offsets(self, part):
+        """
+        Returns the offsets of all the records of a part number: Pir, test records, Prr
+        """
+        prrOffset = int(self.prrOffsets[part - 1])
+        return [int(self.pirOffsets[part - 1])] + self.tests(part) + ([prrOffset] if prrOffset else [])
+
+    #==============================================================================================
+    def find(self, partId=None, waferId=None, head=None, site=None):
+        """
+        Returns the numbers of the parts matching all the given criteria
+        """
+        return [ndx + 1 for ndx in xrange(len(self))
+                if (partId is None or self.partIds[ndx] == partId) and
+                   (waferId is None or self.waferIds[ndx] == waferId) and
+                   (head is None or self.heads[ndx] == head) and
+                   (site is None or self.sites[ndx] == site)]
+
+#**************************************************************************************************
+class PartIndexer(MaterialIndexer):
+    """
+    Sink filling a PartIndex next to the MaterialIndexer part numbering
+    """
+    recordTypes = ('Wir', 'Wrr', 'Pir', 'Prr') + TEST_RECORDS
+    wanted = {
+        'Wrr': ['HEAD_NUM'],
+        'Pir': ['HEAD_NUM', 'SITE_NUM'],
+        'Ptr': ['HEAD_NUM', 'SITE_NUM'],
+        'Mpr': ['HEAD_NUM', 'SITE_NUM'],
+        'Ftr': ['HEAD_NUM', 'SITE_NUM'],
+    }
+
+    def __init__(self):
+        MaterialIndexer.__init__(self)
+        self.index = PartIndex()
+        self.tests = dict()         # open part number to the offsets of its test records so far
+
+    def before_send(self, dataSource, record):
+        MaterialIndexer.before_send(self, dataSource, record)
+        if record.name == 'Wir':
+            self.index.wafers[self.getCurrentWafer(record.values[record.HEAD_NUM])] = record.values[record.WAFER_ID]
+        if record.name in ('Wir', 'Wrr'):
+            return
+        offset = dataSource.inp.tell() - record.header.len - 4
+        head, site = record.values[record.HEAD_NUM], record.values[record.SITE_NUM]
+        part = self.getCurrentPart(head, site)
+        if not part:
+            return                  # outside of a Pir/Prr pair
+        index = self.index
+        if record.name == 'Pir':
+            index.heads.append(head)
+            index.sites.append(site)
+            index.waferIds.append(self.getCurrentWafer(head))
+            index.pirOffsets.append(offset)
+            index.prrOffsets.append(0)
+            index.xs.append(-32768)
+            index.ys.append(-32768)
+            index.hardBins.append(0xffff)
+            index.softBins.append(0xffff)
+            index.partIds.append(None)
+            index.testStarts.append(0)
+            index.testCounts.append(0)
+            self.tests[part] = array(OFFSET_TYPECODE)
+        elif record.name == 'Prr':
+            ndx, values, tests = part - 1, record.values, self.tests.pop(part)
+            index.prrOffsets[ndx] = offset
+            for column, fieldNdx in ((index.xs, record.X_COORD), (index.ys, record.Y_COORD),
+                                     (index.hardBins, record.HARD_BIN), (index.softBins, record.SOFT_BIN)):
+                if values[fieldNdx] is not None:        # else the missing value stays
+                    column[ndx] = values[fieldNdx]
+            index.partIds[ndx] = values[record.PART_ID]
+            index.testStarts[ndx] = len(index.testOffsets)
+            index.testCounts[ndx] = len(tests)
+            index.testOffsets.extend(tests)
+        else:
+            self.tests[part].append(offset)
+
+#**************************************************************************************************
+def buildPartIndex(fileName):
+    indexer = PartIndexer()
+    Parse.process_file(fileName, [indexer], wanted=PartIndexer.wanted)
+    return indexer.index
+
+#**************************************************************************************************
+def openPartIndex(fileName, build=True):
+    """
+    Returns the part index of the file from <file>.parts, built and saved there when missing or stale
+    """
+    return Sidecar.openPickled(fileName, SUFFIX, buildPartIndex, build)
@@ -25,7 +25,8 @@ def filterNull(value):
         return None
     return value
 
-class PartSummarizer(Pipeline.EventSource):
+class PartSummarizer(Pipeline.EventSource, Pipeline.CheckpointSink):
+    recordTypes = ('Prr', 'Pcr')
     FLAG_SYNTH = 0x80
     FLAG_FAIL = 0x08
     FLAG_UNKNOWN = 0x02
@@ -81,6 +82,17 @@ class PartSummarizer(Pipeline.EventSource):
         elif record.name == self.pcr.name:
             self.onPcr(record.values)
 
+    def merge(self, other):
+        """
+        Folds in the parts of the following chunk of the file, see Parallel
+        """
+        for site, counts in other.pcSynth.iteritems():
+            for count, otherCount in zip(self.pcSynth.setdefault(site, ([0], [0], [0])), counts):
+                count[0] += otherCount[0]
+        self.pcSummary.update(other.pcSummary)
+        if other.overall is not None:
+            self.overall = other.overall
+
     def onPrr(self, row):
         partCnt, goodCnt, abortCnt = self.pcSynth.setdefault(row[self.prr.SITE_NUM], ([0], [0], [0]))
         partCnt[0] += 1
@@ -17,26 +17,6 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 #
 
-def appendPrefixAction(fn, ds, action):
-    """Create a function that injects a call to 'action' prior to given function 'fn'"""
-
-    def new_fn(*args):
-        action(ds, *args)
-        fn(*args)
-
-    return new_fn
-
-
-def appendSuffixAction(fn, sink, action):
-    """Create a function that injects a call to 'action' following given function 'fn'"""
-
-    def new_fn(*args):
-        fn(*args)
-        action(sink, *args)
-
-    return new_fn
-
-
 class EventSource(object):
     """
     A generic base class for something that originates events (a source)
@@ -48,32 +28,97 @@ class EventSource(object):
     The sink defines methods based on the event name in order to receive it.
     Event method names in the sink with a 'before_' prefix will be invoked
     prior to the event occurring, similarly, a method with the 'after_' suffix
-    will be invoked after the event occurs."""
+    will be invoked after the event occurs.
+
+    The 'before_' actions run in the reverse order of registration, the 'after_'
+    actions in the order of registration. Each event is compiled into one flat
+    dispatcher over the lists of actions rather than a chain of nested closures."""
 
     def __init__(self, eventNames):
         self.eventNames = eventNames
+        self.actions = dict()   # event name to the event method and its before and after actions
+        self.sinks = []
 
     def addSink(self, sink):
         "Register a DataSink to receive the events it has defined"
+        self.sinks.append(sink)
         for eventName in self.eventNames:
             preEventName = 'before_' + eventName
             postEventName = 'after_' + eventName
+            if not hasattr(sink, preEventName) and not hasattr(sink, postEventName):
+                continue
+            if eventName not in self.actions:
+                self.actions[eventName] = (getattr(self, eventName), [], [])
+            fn, before, after = self.actions[eventName]
             if hasattr(sink, preEventName):
-                setattr(self, eventName,
-                        appendPrefixAction(
-                            getattr(self, eventName),
-                            self, getattr(sink, preEventName)))
+                before.insert(0, (getattr(sink, preEventName), sink))
             if hasattr(sink, postEventName):
-                setattr(self, eventName,
-                        appendSuffixAction(
-                            getattr(self, eventName),
-                            self, getattr(sink, postEventName)))
+                after.append((getattr(sink, postEventName), sink))
+            setattr(self, eventName, self.compileEvent(eventName, fn, before, after))
+
+    def compileEvent(self, eventName, fn, before, after):
+        "Returns the dispatcher calling the before actions, the event method fn and the after actions"
+        before = tuple(action for action, _ in before)
+        after = tuple(action for action, _ in after)
+
+        def dispatch(*args):
+            for action in before:
+                action(self, *args)
+            fn(*args)
+            for action in after:
+                action(self, *args)
+
+        return dispatch
+
+
+def consumes(sink, name):
+    "True when the sink has not restricted the records it is sent or has listed name"
+    recordTypes = getattr(sink, 'recordTypes', None)
+    return recordTypes is None or name in recordTypes
 
 
 class DataSource(EventSource):
+    """
+    Sinks may declare the names of the records they consume in recordTypes,
+    e.g. recordTypes = ('Prr', 'Hbr', 'Sbr'), and are then only sent those records.
+    Sinks without recordTypes are sent every record, the records no sink consumes are not read.
+    """
     def __init__(self, add_events):
         super(DataSource, self).__init__(['begin', 'send', 'complete', 'cancel'] + add_events)
 
+    def compileEvent(self, eventName, fn, before, after):
+        "The send event is routed by record name to the actions of the sinks consuming it, data without a name to all"
+        if eventName != 'send':
+            return super(DataSource, self).compileEvent(eventName, fn, before, after)
+        routes = dict()     # record name to its before and after actions, filled as names are seen
+        routes[None] = (tuple(action for action, _ in before), tuple(action for action, _ in after))
+
+        def route(name):
+            routes[name] = (tuple(action for action, sink in before if consumes(sink, name)),
+                            tuple(action for action, sink in after if consumes(sink, name)))
+            return routes[name]
+
+        def send(record):
+            name = getattr(record, 'name', None)    # e.g. the (recType, fields) tuples of pyatdf
+            try:
+                before, after = routes[name]
+            except KeyError:
+                before, after = route(name)
+            for action in before:
+                action(self, record)
+            fn(record)
+            for action in after:
+                action(self, record)
+
+        return send
+
+    def consumed(self, name):
+        "True when a record of that name would reach a sink, or the send method of a subclass"
+        if type(self).send.im_func is not DataSource.send.im_func:
+            return True
+        fn, before, after = self.actions.get('send', (None, (), ()))
+        return any(consumes(sink, name) for _, sink in before + after)
+
     def begin(self): pass
 
     def send(self, data): pass
@@ -81,4 +126,18 @@ class DataSource(EventSource):
     def complete(self): pass
 
     def cancel(self, exception): pass
-  
+
+
+
+class CheckpointSink(object):
+    """
+    Mixin for sinks whose state is saved in checkpoints (see Checkpoint): by default the instance
+    attributes, less the event plumbing of sinks that are event sources themselves.
+    restoreState() is called after the begin event of the resumed parse.
+    """
+    def checkpointState(self):
+        plumbing = set(getattr(self, 'eventNames', ())) | {'actions', 'eventNames', 'sinks'}
+        return dict((name, value) for name, value in self.__dict__.items() if name not in plumbing)
+
+    def restoreState(self, state):
+        self.__dict__.update(state)
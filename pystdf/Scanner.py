@@ -0,0 +1,120 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+import os
+from array import array
+from collections import Counter
+
+import IO
+import V4
+
+# array has no 'Q' typecode on Python 2, 'L' is 64 bits wide on LP64 platforms
+OFFSET_TYPECODE = 'L' if array('L').itemsize >= 8 else 'd'
+
+#**************************************************************************************************
+#**************************************************************************************************
+class HeaderIndex(object):
+    """
+    Compact map of the records in a stream: header offsets, body lengths and (typ, sub) codes
+    """
+    def __init__(self):
+        self.offsets = array(OFFSET_TYPECODE)
+        self.lengths = array('H')
+        self.types = array('B')
+        self.subs = array('B')
+
+    #==============================================================================================
+    def append(self, offset, length, typ, sub):
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.types.append(typ)
+        self.subs.append(sub)
+
+    #==============================================================================================
+    def __len__(self):
+        return len(self.offsets)
+
+    #==============================================================================================
+    def __getitem__(self, ndx):
+        return int(self.offsets[ndx]), self.lengths[ndx], self.types[ndx], self.subs[ndx]
+
+    #==============================================================================================
+    def name(self, ndx):
+        key = (self.types[ndx], self.subs[ndx])
+        return V4.RecordRegistrar[key].name if key in V4.RecordRegistrar else 'Unknown'
+
+    #==============================================================================================
+    def counts(self):
+        """
+        Returns the record count and total body bytes per (typ, sub)
+        """
+        counts, sizes = Counter(), Counter()
+        for typ, sub, length in zip(self.types, self.subs, self.lengths):
+            counts[(typ, sub)] += 1
+            sizes[(typ, sub)] += length
+        return dict((key, (count, sizes[key])) for key, count in counts.items())
+
+#**************************************************************************************************
+def streamSize(inp):
+    try:
+        return os.fstat(inp.fileno()).st_size
+    except Exception:
+        return None
+
+#**************************************************************************************************
+def scanHeaders(inp, codec=None, index=None):
+    """
+    Walks the record headers from the current position without reading or decoding the bodies.
+    A MappedFile is strided through in memory, other seekable streams seek past each body.
+    A truncated trailing record is left out when the stream size is known.
+    """
+    codec = codec or IO.detectEndian(inp)
+    index = index if index is not None else HeaderIndex()
+    offsets, lengths, types, subs = index.offsets, index.lengths, index.types, index.subs
+    if isinstance(inp, IO.MappedFile):
+        unpackHeader, data, size, pos = codec.unpackHeaderFrom, inp.map, inp.size, inp.tell()
+        while pos + 4 <= size:
+            length, typ, sub = unpackHeader(data, pos)
+            end = pos + 4 + length
+            if end > size:
+                break
+            offsets.append(pos)
+            lengths.append(length)
+            types.append(typ)
+            subs.append(sub)
+            pos = end
+        inp.seek(pos)
+        return index
+    unpackHeader, size, pos = codec.unpackHeader, streamSize(inp), inp.tell()
+    while True:
+        buf = inp.read(4)
+        if len(buf) < 4:
+            break
+        length, typ, sub = unpackHeader(buf)
+        end = pos + 4 + length
+        if size is not None and end > size:
+            break
+        inp.seek(length, 1)
+        offsets.append(pos)
+        lengths.append(length)
+        types.append(typ)
+        subs.append(sub)
+        pos = end
+    inp.seek(pos)
+    return index
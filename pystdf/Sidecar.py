@@ -0,0 +1,235 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+"""
+Persistent index of a file next to it as <file>.idx: the offset and (typ, sub) of every record and
+the wafer, insertion and part ids MaterialMapper gives it, built by one parse and then loaded
+straight into arrays. The index is only used while the size, mtime and a hash of the head and tail
+of the file still match the ones it was built from.
+The other indexes of a file (see PartIndex) are kept next to it the same way, pickled.
+"""
+
+from array import array
+import cPickle
+import hashlib
+import os
+from struct import Struct
+import sys
+
+from Indexing import MaterialIndexer
+from Mapping import MaterialMapper, NO_ID
+from Scanner import OFFSET_TYPECODE
+import Parse
+import V4
+
+MAGIC = 'PYSTDFIX'
+VERSION = 3                     # 2: a new wafer after each Wrr, 3: insertions ended by records not sent
+SAMPLE = 1024 * 1024            # bytes hashed at each end of the file
+HEADER = Struct('=8sHBBQdQ16s')     # magic, version, offset itemsize, little endian, size, mtime, count, md5
+
+#**************************************************************************************************
+def indexName(fileName):
+    return fileName + '.idx'
+
+#**************************************************************************************************
+def fingerprint(fileName):
+    """
+    Returns the size, mtime and md5 of the first and last SAMPLE bytes of the file
+    """
+    stat = os.stat(fileName)
+    digest = hashlib.md5()
+    with open(fileName, 'rb') as inp:
+        digest.update(inp.read(SAMPLE))
+        if stat.st_size > SAMPLE:
+            inp.seek(max(SAMPLE, stat.st_size - SAMPLE))
+            digest.update(inp.read(SAMPLE))
+    return stat.st_size, stat.st_mtime, digest.digest()
+
+#**************************************************************************************************
+#**************************************************************************************************
+class FileIndex(object):
+    """
+    Record offsets, type codes and material ids as arrays, NO_ID standing for no id
+    """
+    columns = ('offsets', 'types', 'subs', 'waferIds', 'insertionIds', 'partIds')
+
+    def __init__(self):
+        self.offsets = array(OFFSET_TYPECODE)
+        self.types = array('B')
+        self.subs = array('B')
+        self.waferIds = array('i')
+        self.insertionIds = array('i')
+        self.partIds = array('i')
+
+    #==============================================================================================
+    def __len__(self):
+        return len(self.offsets)
+
+    #==============================================================================================
+    def __getitem__(self, ndx):
+        return int(self.offsets[ndx]), self.types[ndx], self.subs[ndx]
+
+    #==============================================================================================
+    def name(self, ndx):
+        key = (self.types[ndx], self.subs[ndx])
+        return V4.RecordRegistrar[key].name if key in V4.RecordRegistrar else 'Unknown'
+
+    #==============================================================================================
+    def material(self, ndx):
+        """
+        Returns the (wafer, insertion, part) ids of a record, None for no id
+        """
+        return tuple(None if ids[ndx] == NO_ID else ids[ndx]
+                     for ids in (self.waferIds, self.insertionIds, self.partIds))
+
+    #==============================================================================================
+    def save(self, fileName):
+        size, mtime, digest = fingerprint(fileName)
+        tmpName = indexName(fileName) + '.tmp'
+        with open(tmpName, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, VERSION, self.offsets.itemsize, sys.byteorder == 'little',
+                                  size, mtime, len(self), digest))
+            for column in self.columns:
+                getattr(self, column).tofile(out)
+        if os.name == 'nt' and os.path.exists(indexName(fileName)):
+            os.remove(indexName(fileName))
+        os.rename(tmpName, indexName(fileName))
+
+    #==============================================================================================
+    @classmethod
+    def load(cls, fileName):
+        """
+        Returns the saved index of the file, None when there is none or it does not match the file
+        """
+        try:
+            with open(indexName(fileName), 'rb') as inp:
+                header = inp.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return None
+                magic, version, itemSize, little, size, mtime, count, digest = HEADER.unpack(header)
+                index = cls()
+                if (magic, version, itemSize, little) != (MAGIC, VERSION, index.offsets.itemsize,
+                                                          sys.byteorder == 'little'):
+                    return None
+                stat = os.stat(fileName)
+                if (size, mtime) != (stat.st_size, stat.st_mtime) or digest != fingerprint(fileName)[2]:
+                    return None
+                for column in cls.columns:
+                    getattr(index, column).fromfile(inp, count)
+                return index
+        except (IOError, OSError, EOFError):
+            return None
+
+#**************************************************************************************************
+class IndexBuilder(MaterialIndexer):
+    """
+    Sink filling a FileIndex: every header is indexed, only the records carrying material ids are sent
+    """
+    recordTypes = tuple(MaterialMapper.indexed)
+    wanted = {
+        'Wir': ['HEAD_NUM', 'SITE_GRP'],
+        'Wrr': ['HEAD_NUM'],
+        'Pir': ['HEAD_NUM', 'SITE_NUM'],
+        'Prr': ['HEAD_NUM', 'SITE_NUM'],
+        'Ptr': ['HEAD_NUM', 'SITE_NUM'],
+        'Mpr': ['HEAD_NUM', 'SITE_NUM'],
+        'Ftr': ['HEAD_NUM', 'SITE_NUM'],
+    }
+
+    def __init__(self):
+        MaterialIndexer.__init__(self)
+        self.index = FileIndex()
+
+    def before_header(self, dataSource, header):
+        if self.closingInsertion and header.name not in ('Prr', 'Unknown'):
+            self.closeInsertion()       # on any record a full parse sends, not only the ones sent here
+        index = self.index
+        index.offsets.append(dataSource.inp.tell() - 4)
+        index.types.append(header.typ)
+        index.subs.append(header.sub)
+        index.waferIds.append(NO_ID)
+        index.insertionIds.append(NO_ID)
+        index.partIds.append(NO_ID)
+
+    def before_send(self, dataSource, record):
+        MaterialIndexer.before_send(self, dataSource, record)
+        index, head = self.index, record.values[record.HEAD_NUM]
+        index.waferIds[-1] = self.getCurrentWafer(head)
+        index.insertionIds[-1] = self.getCurrentInsertion(head)
+        if record.name in MaterialMapper.perPart:
+            index.partIds[-1] = self.getCurrentPart(head, record.values[record.SITE_NUM])
+
+#**************************************************************************************************
+def buildIndex(fileName):
+    builder = IndexBuilder()
+    Parse.process_file(fileName, [builder], wanted=IndexBuilder.wanted)
+    return builder.index
+
+#**************************************************************************************************
+def openIndex(fileName, build=True):
+    """
+    Returns the index of the file, loaded from <file>.idx when it matches the file, otherwise built
+    and saved there (kept in memory only when the directory is read only), None when not building
+    """
+    index = FileIndex.load(fileName)
+    if index is None and build:
+        index = buildIndex(fileName)
+        try:
+            index.save(fileName)
+        except (IOError, OSError):
+            pass
+    return index
+
+#**************************************************************************************************
+def savePickled(fileName, suffix, index):
+    """
+    Saves an index of the file as <file><suffix> with the fingerprint of the file
+    """
+    tmpName = fileName + suffix + '.tmp'
+    with open(tmpName, 'wb') as out:
+        cPickle.dump((VERSION, fingerprint(fileName), index), out, cPickle.HIGHEST_PROTOCOL)
+    if os.name == 'nt' and os.path.exists(fileName + suffix):
+        os.remove(fileName + suffix)
+    os.rename(tmpName, fileName + suffix)
+
+#**************************************************************************************************
+def loadPickled(fileName, suffix):
+    """
+    Returns the index saved by savePickled, None when there is none or it does not match the file
+    """
+    try:
+        with open(fileName + suffix, 'rb') as inp:
+            version, saved, index = cPickle.load(inp)
+        return index if (version, saved) == (VERSION, fingerprint(fileName)) else None
+    except (IOError, OSError, EOFError, ValueError, cPickle.UnpicklingError):
+        return None
+
+#**************************************************************************************************
+def openPickled(fileName, suffix, builder, build=True):
+    """
+    Returns the index loaded from <file><suffix>, otherwise made by builder(fileName) and saved there
+    """
+    index = loadPickled(fileName, suffix)
+    if index is None and build:
+        index = builder(fileName)
+        try:
+            savePickled(fileName, suffix, index)
+        except (IOError, OSError):
+            pass
+    return index
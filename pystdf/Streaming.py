@@ -0,0 +1,301 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+"""
+Parses STDF arriving over sockets as it is written, without landing it on disk.
+
+StreamParser is pushed chunks of any size with feed() and sends every record completed so far
+to its sinks, it does not care where the chunks come from (a socket, a pipe, an event loop).
+Collector is a TCP server taking many tester connections at once: per connection a reader
+thread receives chunks into a bounded queue and a parser thread feeds them to a StreamParser,
+so a slow parse blocks the reader and TCP flow control holds back the tester.
+FileFollower tails a file the tester is still writing, follow() watches many from one thread.
+"""
+
+import io
+from Queue import Queue
+import SocketServer
+import socket
+import threading
+import time
+import traceback
+
+import IO
+import V4
+import Types
+from Parse import Parser, wantedCounts
+from Pipeline import DataSource
+
+#**************************************************************************************************
+#**************************************************************************************************
+class StreamParser(Parser):
+    """
+    Parser fed by chunks: feed() for the data, close() at the end of the stream.
+    The byte order is taken from the FAR once it has arrived. Sinks get the same events as from Parser,
+    dataSource.inp.tell() is the stream offset as for a file.
+    """
+    def __init__(self, lazy=None, wanted=None, numpyArrays=False, internStrings=False, recycle=False,
+                 skipLazy=False):
+        DataSource.__init__(self, ['header', 'context'])
+        self.inp = self             # record bodies are read from the reassembly buffer
+        self.lazy = lazy
+        self.skipLazy = skipLazy
+        self.recordClasses = dict()
+        self.verify = False
+        self.wanted = wantedCounts(wanted)
+        self.numpyArrays = numpyArrays
+        self.internStrings = internStrings
+        self.recycled = dict() if recycle else None
+        self.codec = None
+        self.buf = ''
+        self.pos = 0                # read position within buf
+        self.base = 0               # stream offset of buf[0]
+
+    #==============================================================================================
+    def read(self, size):
+        pos = self.pos
+        self.pos = pos + size
+        return self.buf[pos:pos + size]
+
+    #==============================================================================================
+    def tell(self):
+        return self.base + self.pos
+
+    #==============================================================================================
+    def seek(self, offset, whence=0):
+        self.pos = offset - self.base + (self.tell() if whence == 1 else 0)
+
+    #==============================================================================================
+    def feed(self, data):
+        """
+        Appends a chunk of the stream and sends the records it completes, begins once the FAR is in
+        """
+        self.base += self.pos
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        if self.codec is None:
+            if len(self.buf) < 5:
+                return
+            self.codec = IO.detectEndian(self, self.numpyArrays, self.internStrings)
+            self.begin()
+        unpackHeader, buf = self.codec.unpackHeaderFrom, self.buf
+        while len(buf) - self.pos >= 4:
+            length, typ, sub = unpackHeader(buf, self.pos)
+            if len(buf) - self.pos - 4 < length:
+                break           # the rest of the record is still on its way
+            header = IO.readHeader(self.codec, self, V4.RecordRegistrar)
+            self.header(header)
+            try:
+                cls = self.recordClasses[(typ, sub)]
+            except KeyError:
+                cls = self.recordClass((typ, sub))
+            if cls is not None:
+                record = self.newRecord(cls, header)
+                if record.name in self.wanted:
+                    IO.decodeLazy(self.codec, record, self.wanted[record.name])
+                elif not self.lazy or record.name in self.lazy:
+                    IO.decodeValues(self.codec, record)
+                self.send(record)
+            else:
+                self.pos += length
+
+    #==============================================================================================
+    def close(self):
+        """
+        Ends the stream: complete, or cancel with a TruncatedRecordException when it stopped mid record
+        """
+        if self.codec is None:
+            self.cancel(Types.EofException('Stream ended before the FAR'))
+        elif self.pos < len(self.buf):
+            self.cancel(Types.TruncatedRecordException('Stream ended inside a record at %d' % self.tell()))
+        else:
+            self.complete()
+
+#**************************************************************************************************
+#**************************************************************************************************
+class CollectorHandler(SocketServer.BaseRequestHandler):
+    """
+    One tester connection: receives into the bounded queue while a thread parses out of it
+    """
+    def handle(self):
+        server = self.server
+        chunks = Queue(server.queueSize)
+        sinks = server.sinkFactory(self.client_address)
+        parser = StreamParser(**server.options)
+        for sink in sinks:
+            parser.addSink(sink)
+        errors = []                     # traceback and exception of the first failure in either thread
+        lock = threading.Lock()
+        failed = threading.Event()
+
+        def fail(exception):
+            with lock:
+                if not errors:
+                    errors.append((traceback.format_exc(), exception))
+            failed.set()
+
+        def parse():
+            cancelled = False
+            for chunk in iter(chunks.get, None):
+                if failed.is_set():
+                    continue            # drained so that the reader never blocks
+                try:
+                    parser.feed(chunk)
+                except Exception, exception:
+                    fail(exception)
+                    parser.cancel(exception)
+                    cancelled = True
+            if not failed.is_set():
+                parser.close()
+            elif not cancelled:
+                parser.cancel(errors[0][1])     # the connection failed, the sinks still get their end event
+
+        worker = threading.Thread(target=parse)
+        worker.start()
+        try:
+            while not failed.is_set():
+                chunk = self.request.recv(server.chunkSize)
+                if not chunk:
+                    break
+                chunks.put(chunk)           # blocks while the parser is queueSize chunks behind
+        except socket.error, exception:
+            fail(exception)
+        finally:
+            chunks.put(None)
+            worker.join()
+        server.finished(self.client_address, sinks, errors[0][0] if errors else None)
+
+#**************************************************************************************************
+class Collector(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    """
+    TCP server parsing every connection into the sinks made by sinkFactory(clientAddress).
+    finished(clientAddress, sinks, error) is called once a connection is parsed, error being
+    the traceback of a failure or None. The options are those of StreamParser.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, sinkFactory, finished=None, queueSize=64, chunkSize=64 * 1024, **options):
+        SocketServer.TCPServer.__init__(self, address, CollectorHandler)
+        self.sinkFactory = sinkFactory
+        self.onFinished = finished
+        self.queueSize = queueSize
+        self.chunkSize = chunkSize
+        self.options = options
+
+    def finished(self, clientAddress, sinks, error):
+        if self.onFinished:
+            self.onFinished(clientAddress, sinks, error)
+
+#**************************************************************************************************
+def replay(fileName, address, chunkSize=4096):
+    """
+    Sends a file to a collector in chunks the way a tester would, for trying out a Collector locally
+    """
+    sock = socket.create_connection(address)
+    try:
+        with open(fileName, 'rb') as inp:
+            for chunk in iter(lambda: inp.read(chunkSize), ''):
+                sock.sendall(chunk)
+    finally:
+        sock.close()
+
+#**************************************************************************************************
+#**************************************************************************************************
+class FileFollower(object):
+    """
+    Tails a file still being written: poll() feeds the bytes it has grown by to a StreamParser,
+    a partial trailing record waits in the parser for the rest, nothing is read twice.
+    The sinks see the records as they land, e.g. live bin counts from a BinSummarizer.
+    The file is finished at its Mrr, or by finish() (see follow() for the idle timeout).
+    """
+    recordTypes = ('Mrr',)
+
+    def __init__(self, fileName, sinks, chunkSize=1024 * 1024, **options):
+        self.fileName = fileName
+        self.sinks = sinks
+        self.chunkSize = chunkSize
+        self.file = io.open(fileName, 'rb', buffering=0)    # unbuffered reads see what was appended past EOF
+        self.parser = StreamParser(**options)
+        for sink in sinks:
+            self.parser.addSink(sink)
+        self.parser.addSink(self)
+        self.ended = False
+        self.done = False
+        self.error = None
+        self.lastGrowth = time.time()
+
+    #==============================================================================================
+    def after_send(self, _, record):
+        self.ended = True               # the Mrr closes the file
+
+    #==============================================================================================
+    def poll(self):
+        """
+        Feeds up to chunkSize bytes appended since the last poll, returns the number of bytes read
+        """
+        if self.done:
+            return 0
+        try:
+            data = self.file.read(self.chunkSize)
+            if data:
+                self.parser.feed(data)
+        except Exception, exception:
+            self.error = traceback.format_exc()
+            self.done = True
+            self.file.close()
+            self.parser.cancel(exception)
+            return 0
+        if data:
+            self.lastGrowth = time.time()
+        if self.ended:
+            self.finish()
+        return len(data)
+
+    #==============================================================================================
+    def finish(self):
+        """
+        Stops following: complete, or cancel when the file stopped inside a record or before the FAR
+        """
+        if not self.done:
+            self.done = True
+            self.file.close()
+            self.parser.close()
+
+#**************************************************************************************************
+def follow(followers, interval=1.0, timeout=None, progress=None):
+    """
+    Polls the followers round robin from this thread until each has ended, failed or, with a timeout,
+    not grown for timeout seconds. A round with no new data in any file sleeps for interval seconds.
+    progress(follower) is called after a follower took in new data.
+    """
+    pending = list(followers)
+    while pending:
+        grown = False
+        for follower in pending:
+            if follower.poll():
+                grown = True
+                if progress:
+                    progress(follower)
+            if not follower.done and timeout is not None and time.time() - follower.lastGrowth > timeout:
+                follower.finish()
+        pending = [follower for follower in pending if not follower.done]
+        if pending and not grown:
+            time.sleep(interval)
+    return followers
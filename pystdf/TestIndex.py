@@ -0,0 +1,145 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+"""
+Inverted index of the test records: (TEST_NUM, HEAD_NUM, SITE_NUM) to the offsets of the Ptr, Mpr
+and Ftr records carrying it, kept as varint deltas in one byte string per key.
+Ptr, Mpr and Ftr all start with TEST_NUM, HEAD_NUM and SITE_NUM, so the index is built from a header
+scan reading the first 6 bytes of the test records and nothing else.
+Saved next to the file as <file>.tests, Parse.Reader.iter_test() decodes only the records of a test.
+"""
+
+from heapq import merge
+from struct import Struct
+
+import IO
+import Sidecar
+
+SUFFIX = '.tests'
+TEST_RECORDS = ((15, 10), (15, 15), (15, 20))     # Ptr, Mpr, Ftr
+
+#**************************************************************************************************
+def encodeDelta(buf, delta):
+    while delta >= 0x80:
+        buf.append(delta & 0x7f | 0x80)
+        delta >>= 7
+    buf.append(delta)
+
+def decodeDeltas(data):
+    """
+    Yields the offsets of a varint delta string
+    """
+    offset = delta = shift = 0
+    for byte in bytearray(data):
+        delta |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            offset += delta
+            yield offset
+            delta = shift = 0
+
+#**************************************************************************************************
+#**************************************************************************************************
+class TestIndex(object):
+    """
+    (TEST_NUM, HEAD_NUM, SITE_NUM) to the offsets of its test records as varint deltas
+    """
+    def __init__(self):
+        self.deltas = dict()
+        self.last = dict()          # offset last added per key while building
+
+    #==============================================================================================
+    def add(self, key, offset):
+        buf = self.deltas.get(key)
+        if buf is None:
+            buf = self.deltas[key] = bytearray()
+        encodeDelta(buf, offset - self.last.get(key, 0))
+        self.last[key] = offset
+
+    #==============================================================================================
+    def __getstate__(self):
+        return dict(deltas=dict((key, str(buf)) for key, buf in self.deltas.items()))
+
+    def __setstate__(self, state):
+        self.deltas = state['deltas']
+        self.last = dict()
+
+    #==============================================================================================
+    def testNumbers(self):
+        return sorted(set(testNum for testNum, _, _ in self.deltas))
+
+    #==============================================================================================
+    def keys(self, testNum, head=None, site=None):
+        return [key for key in self.deltas if key[0] == testNum and
+                (head is None or key[1] == head) and (site is None or key[2] == site)]
+
+    #==============================================================================================
+    def offsets(self, testNum, head=None, site=None):
+        """
+        Yields in file order the offsets of the records of a test, on any head and site unless given
+        """
+        return merge(*[decodeDeltas(self.deltas[key]) for key in self.keys(testNum, head, site)])
+
+#**************************************************************************************************
+def buildTestIndex(fileName):
+    import Parse
+    reader = Parse.Reader(fileName, mapped=True)
+    try:
+        return scanTests(reader.inp, reader.codec)
+    finally:
+        reader.close()
+
+def scanTests(inp, codec):
+    """
+    Indexes the test records from the current position, reading only their first 6 bytes
+    """
+    index = TestIndex()
+    unpackKey = Struct(codec.endian + 'IBB').unpack_from
+    if isinstance(inp, IO.MappedFile):
+        unpackHeader, data, size, pos = codec.unpackHeaderFrom, inp.map, inp.size, inp.tell()
+        while pos + 4 <= size:
+            length, typ, sub = unpackHeader(data, pos)
+            if (typ, sub) in TEST_RECORDS and length >= 6 and pos + 10 <= size:
+                index.add(unpackKey(data, pos + 4), pos)
+            pos += 4 + length
+        return index
+    unpackHeader, pos = codec.unpackHeader, inp.tell()
+    while True:
+        buf = inp.read(4)
+        if len(buf) < 4:
+            break
+        length, typ, sub = unpackHeader(buf)
+        if (typ, sub) in TEST_RECORDS and length >= 6:
+            body = inp.read(6)
+            if len(body) < 6:
+                break
+            index.add(unpackKey(body), pos)
+            inp.seek(length - 6, 1)
+        else:
+            inp.seek(length, 1)
+        pos += 4 + length
+    return index
+
+#**************************************************************************************************
+def openTestIndex(fileName, build=True):
+    """
+    Returns the test index of the file from <file>.tests, built and saved there when missing or stale
+    """
+    return Sidecar.openPickled(fileName, SUFFIX, buildTestIndex, build)
@@ -17,7 +17,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 #
 
-from Pipeline import EventSource
+from Pipeline import EventSource, CheckpointSink
 import V4
 
 def filterNull(value):
@@ -25,7 +25,8 @@ def filterNull(value):
         return None
     return value
 
-class TestSummarizer(EventSource):
+class TestSummarizer(EventSource, CheckpointSink):
+    recordTypes = ('Ptr', 'Mpr', 'Ftr', 'Tsr')
     FLAG_SYNTH   = 0x80
     FLAG_OVERALL = 0x01
     PTR_TEST_TXT = 0x00
@@ -107,6 +108,28 @@ class TestSummarizer(EventSource):
         elif record.name == self.tsr.name:
             self.onTsr(record.values)
 
+    @staticmethod
+    def mergeCounts(counts, otherCounts):
+        for key, otherCount in otherCounts.iteritems():
+            counts.setdefault(key, [0])[0] += otherCount[0]
+
+    @staticmethod
+    def mergeSets(sets, otherSets):
+        for key, otherSet in otherSets.iteritems():
+            sets.setdefault(key, set()).update(otherSet)
+
+    def merge(self, other):
+        """
+        Folds in the tests of the following chunk of the file, see Parallel
+        """
+        for name in ('testExecs', 'testFails', 'testInvalid', 'cyclCntMap', 'relVadrMap', 'failPinMap'):
+            self.mergeCounts(getattr(self, name), getattr(other, name))
+        self.mergeSets(self.testAliasMap, other.testAliasMap)
+        self.mergeSets(self.limitsMap, other.limitsMap)
+        self.summaryTsrs.update(other.summaryTsrs)
+        self.overallTsrs.update(other.overallTsrs)
+        self.unitsMap.update(other.unitsMap)
+
     def onPtr(self, row):
         execCount = self.testExecs.setdefault(
             (row[self.ptr.SITE_NUM], row[self.ptr.TEST_NUM]), [0])
@@ -39,23 +39,44 @@ class RecordHeader(object):
 #**************************************************************************************************
 #**************************************************************************************************
 class RecordType(object):
-    name, typ, sub, fieldMap, sizeMap, _fields = '', None, None, (), {}, []
+    name, typ, sub, fieldMap, sizeMap, _fields, _decoders, _encoders = '', None, None, (), {}, [], {}, {}
     arrayMatch = re.compile('k(\d+)([A-Z][a-z0-9]+)')
     Field = namedtuple('Field', 'name format missing index arrayFmt arrayNdx itemNdx')
     __slots__ = ['parser', 'header', 'buffer', 'original', 'values']
     #==============================================================================================
     def __init__(self, header=None, parser=None, **kwargs):
+        self.recycle(header, parser)
+        if kwargs:
+            self.setValues(**kwargs)
+
+    #==============================================================================================
+    def recycle(self, header, parser):
+        """
+        Reads the next record of this class into the instance, replacing its content.
+        The field offsets kept for verification (original) are only allocated when verifying
+        """
         self.parser = parser
         self.header = header
         self.buffer = ''
         if header and parser:
             self.buffer = parser.inp.read(header.len)
             if self.buffer is None or len(self.buffer) != header.len:
-                raise EofException()
-        self.original = dict()
+                raise TruncatedRecordException('%s cut short at %d of %d bytes' % (
+                    self.name, len(self.buffer or ''), header.len))
+        self.original = None
         self.values = [None] * len(self.fieldMap)
-        if kwargs:
-            self.setValues(**kwargs)
+
+    #==============================================================================================
+    def copy(self):
+        """
+        Returns an independent copy of the record, the way to keep a record from a recycling parser
+        """
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)        # a field map set dynamically
+        other.parser, other.header, other.buffer = self.parser, self.header, self.buffer
+        other.original = None if self.original is None else dict(self.original)
+        other.values = list(self.values)
+        return other
     
     #==============================================================================================
     def setFieldMap(self, fieldMap):
@@ -65,6 +86,8 @@ class RecordType(object):
         self.fieldMap = fieldMap
         self.values = [None] * len(fieldMap)
         self._fields = [None] * len(fieldMap)
+        self._decoders = {}             # the compiled decoders only know the class field map
+        self._encoders = {}
         for ndx, fld in enumerate(self.fieldMap):
             setattr(self, fld[0], ndx)
             arrayFmt, arrayNdx, itemNdx  = None, None, None
@@ -150,6 +173,8 @@ class UnknownRecord(RecordType):
 #**************************************************************************************************
 class EofException(Exception): pass
 
+class TruncatedRecordException(EofException): pass
+
 class EndOfRecordException(Exception): pass
 
 class InitialSequenceException(Exception): pass
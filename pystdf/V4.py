@@ -127,7 +127,7 @@ kxTYPE      Array of data of the type specified.                 TYPE[]
 """
 
 from Types import RecordType, UnknownRecord
-from IO import encodeGdr, GEN_DATA_
+from IO import encodeGdr, compileDecoders, compileEncoders, GEN_DATA_
 
 B7, B6, B5, B4, B3, B2, B1, B0, BN = 0x7f, 0xbf, 0xdf, 0xef, 0xf7, 0xfb, 0xfd, 0xfe, 0xff
 
@@ -144,6 +144,7 @@ def recordByType(typ, sub):
 def registerMe(cls):
     """
     Decorator places each record class into the registrar by name and (type, subtype)
+    and compiles its decoders and encoders
     """
     cls.name = cls.__name__
     cls._fields = [None] * len(cls.fieldMap)
@@ -163,6 +164,8 @@ def registerMe(cls):
                                 arrayFmt=arrayFmt,
                                 arrayNdx=arrayNdx,
                                 itemNdx=itemNdx)
+    cls._decoders = compileDecoders(cls._fields)
+    cls._encoders = compileEncoders(cls._fields)
     RecordRegistrar[cls.name] = RecordRegistrar[(cls.typ, cls.sub)] = cls
     return cls
 
@@ -3004,6 +3007,12 @@ class Gdr(RecordType):
         self.setFieldMap(fm)            # replace the field map dynamically
         self.values = vn
 
+    #==============================================================================================
+    def recycle(self, header, parser):
+        for attr in ('fieldMap', '_fields', '_decoders', '_encoders'):
+            self.__dict__.pop(attr, None)   # back to the class field map, the previous one was dynamic
+        super(Gdr, self).recycle(header, parser)
+
 @registerMe
 class Dtr(RecordType):
     """
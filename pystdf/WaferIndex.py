@@ -0,0 +1,174 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+
+
+"""
+Spatial access to the dies of each wafer, for inking and neighborhood screening.
+
+WaferIndex is made in memory from the part index (see PartIndex, saved as <file>.parts) with no
+pass over the file: the parts are grouped by the wafer MaterialIndexer numbered them in (from each Wir)
+and by their Prr X_COORD/Y_COORD. Per wafer a WaferMap keeps every die's part numbers and final bins,
+and the sorted xs of each row so that a region query bisects only the rows it spans.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+try:
+    import numpy
+    have_numpy = True
+except ImportError:
+    have_numpy = False
+
+MISSING = -32768                # X_COORD/Y_COORD of a part without coordinates
+
+#**************************************************************************************************
+#**************************************************************************************************
+class WaferMap(object):
+    """
+    The dies of one wafer by (x, y): the numbers of the parts tested there in file order
+    (a retest comes last) and the hard and soft bins of the last of them
+    """
+    def __init__(self, waferId, name=None):
+        self.waferId = waferId
+        self.name = name
+        self.dies = dict()          # (x, y) to part numbers
+        self.bins = dict()          # (x, y) to (hard bin, soft bin) of the last part
+        self.rows = dict()          # y to the sorted xs of its dies
+
+    #==============================================================================================
+    def __len__(self):
+        return len(self.dies)
+
+    #==============================================================================================
+    def add(self, x, y, part, hardBin, softBin):
+        parts = self.dies.get((x, y))
+        if parts is None:
+            parts = self.dies[(x, y)] = []
+            insort(self.rows.setdefault(y, []), x)
+        parts.append(part)
+        self.bins[(x, y)] = (hardBin, softBin)
+
+    #==============================================================================================
+    def parts(self, x, y):
+        """
+        Returns the numbers of the parts tested at (x, y), empty for no die
+        """
+        return self.dies.get((x, y), [])
+
+    #==============================================================================================
+    def bin(self, x, y, soft=False):
+        """
+        Returns the final hard (or soft) bin of the die at (x, y), None for no die
+        """
+        bins = self.bins.get((x, y))
+        return bins and bins[soft]
+
+    #==============================================================================================
+    def bounds(self):
+        """
+        Returns (xMin, yMin, xMax, yMax) over the dies
+        """
+        return (min(xs[0] for xs in self.rows.itervalues()), min(self.rows),
+                max(xs[-1] for xs in self.rows.itervalues()), max(self.rows))
+
+    #==============================================================================================
+    def region(self, xMin, yMin, xMax, yMax):
+        """
+        Returns the (x, y) of the dies inside the rectangle, limits included, row by row
+        """
+        dies, rows = [], self.rows
+        for y in xrange(yMin, yMax + 1):
+            xs = rows.get(y)
+            if xs:
+                dies.extend((x, y) for x in xs[bisect_left(xs, xMin):bisect_right(xs, xMax)])
+        return dies
+
+    #==============================================================================================
+    def within(self, x, y, radius):
+        """
+        Returns the (x, y) of the dies at most radius from (x, y), itself included
+        """
+        reach, limit = int(radius), radius * radius
+        return [(dx, dy) for dx, dy in self.region(x - reach, y - reach, x + reach, y + reach)
+                if (dx - x) * (dx - x) + (dy - y) * (dy - y) <= limit]
+
+    #==============================================================================================
+    def neighbors(self, x, y, rings=1):
+        """
+        Returns the (x, y) of the dies in the rings squares around (x, y), 8 for one ring on a full wafer
+        """
+        return [die for die in self.region(x - rings, y - rings, x + rings, y + rings) if die != (x, y)]
+
+    #==============================================================================================
+    def binMap(self, soft=False, missing=-1):
+        """
+        Returns (grid, xMin, yMin): the final bin of the die at (x, y) is grid[y - yMin][x - xMin],
+        missing where there is no die. The grid is a 2-D int32 NumPy array, or a list of lists without NumPy.
+        """
+        if not self.dies:
+            return ([], 0, 0)
+        xMin, yMin, xMax, yMax = self.bounds()
+        width, height = xMax - xMin + 1, yMax - yMin + 1
+        if have_numpy:
+            grid = numpy.empty((height, width), dtype=numpy.int32)
+            grid.fill(missing)
+        else:
+            grid = [[missing] * width for _ in xrange(height)]
+        for (x, y), bins in self.bins.iteritems():
+            grid[y - yMin][x - xMin] = bins[soft]
+        return (grid, xMin, yMin)
+
+#**************************************************************************************************
+class WaferIndex(object):
+    """
+    The WaferMap of every wafer of a PartIndex by wafer number (0 for parts tested outside a Wir/Wrr),
+    named after the WAFER_ID of the wafer's Wir. Parts without coordinates are left out.
+    """
+    def __init__(self, partIndex):
+        self.wafers = dict()
+        wafers, names = self.wafers, partIndex.wafers
+        xs, ys, waferIds = partIndex.xs, partIndex.ys, partIndex.waferIds
+        hardBins, softBins = partIndex.hardBins, partIndex.softBins
+        for ndx in xrange(len(partIndex)):
+            x, y = xs[ndx], ys[ndx]
+            if x == MISSING or y == MISSING:
+                continue
+            wafer = wafers.get(waferIds[ndx])
+            if wafer is None:
+                wafer = wafers[waferIds[ndx]] = WaferMap(waferIds[ndx], names.get(waferIds[ndx]))
+            wafer.add(x, y, ndx + 1, hardBins[ndx], softBins[ndx])
+
+    #==============================================================================================
+    def __len__(self):
+        return len(self.wafers)
+
+    #==============================================================================================
+    def __iter__(self):
+        return (self.wafers[waferId] for waferId in sorted(self.wafers))
+
+    #==============================================================================================
+    def __getitem__(self, waferId):
+        return self.wafers[waferId]
+
+    #==============================================================================================
+    def byName(self, name):
+        """
+        Returns the WaferMaps of the wafers whose Wir has WAFER_ID name, in file order
+        """
+        return [wafer for wafer in self if wafer.name == name]
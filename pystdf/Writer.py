@@ -63,23 +63,51 @@ class AtdfWriter(object):
 #*******************************************************************************************************************
 class StdfWriter(object):
     """
+    Writes in the byte order of the given codec,
+    without one the byte order of the parsed file is followed (native when writing standalone)
+    While attached to a parse, records are packed into a reusable buffer written out once bufferSize
+    bytes are pending and at the end of the parse. Standalone, each write goes straight to the stream.
     """
     # =============================================================================================
-    def __init__(self, stream=sys.stdout):
+    def __init__(self, stream=sys.stdout, codec=None, bufferSize=1 << 20):
         self.stream = stream
+        self.followSource = codec is None
+        self.codec = codec or IO.Codec()
+        self.bufferSize = bufferSize
+        self.buffer = bytearray()
+        self.attached = False           # to a parse, between its begin and its complete or cancel event
 
     # =============================================================================================
     def writeRecord(self, record):
-        encodedValues = IO.encodeRecord(record)
-        packedRecord = IO.packRecord(record, encodedValues)
-        self.stream.write(packedRecord)
+        IO.packRecordInto(self.codec, record, self.buffer)
+        if not self.attached or len(self.buffer) >= self.bufferSize:
+            self.writeBuffer()
 
     # =============================================================================================
     def writeRecords(self, records):
-        packedRecords = ''
         for record in records:
-            packedRecords += IO.packRecord(record, IO.encodeRecord(record))
-        self.stream.write(packedRecords)
+            IO.packRecordInto(self.codec, record, self.buffer)
+            if len(self.buffer) >= self.bufferSize:
+                self.writeBuffer()
+        if not self.attached:
+            self.writeBuffer()
+
+    # =============================================================================================
+    def writeBuffer(self):
+        if self.buffer:
+            self.stream.write(str(self.buffer))
+            del self.buffer[:]
+
+    # =============================================================================================
+    def flush(self):
+        self.writeBuffer()
+        self.stream.flush()
+
+    # =============================================================================================
+    def before_begin(self, dataSource):
+        self.attached = True
+        if self.followSource:
+            self.codec = dataSource.codec
 
     # =============================================================================================
     def after_send(self, dataSource, record):
@@ -87,7 +115,13 @@ class StdfWriter(object):
 
     # =============================================================================================
     def after_complete(self, _):
-        self.stream.flush()
+        self.attached = False
+        self.flush()
+
+    # =============================================================================================
+    def after_cancel(self, _, exception):
+        self.attached = False
+        self.flush()
 
 #*******************************************************************************************************************
 class StdfModifier(StdfWriter):
@@ -109,8 +143,8 @@ class StdfVerify(object):
     """
     @staticmethod
     # =============================================================================================
-    def after_send(_, record):
-        processedData = IO.encodeRecord(record)
+    def after_send(dataSource, record):
+        processedData = IO.encodeRecord(dataSource.codec, record)
         for field in record.fields():
             record.verify(field.name, field.format, processedData[field.index])
 
@@ -41,6 +41,7 @@ def dpatLimits(passingValues, lowerThreshold, upperThreshold):
 
 #*******************************************************************************************************************
 class DpatSink(object):
+    recordTypes = ('Prr', 'Pmr', 'Mpr')
     def __init__(self):
         self.defaults = None
         self.parts = None
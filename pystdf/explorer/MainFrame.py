@@ -24,8 +24,9 @@ import wx.grid
 import wx.gizmos
 from wx.lib.anchors import LayoutAnchors
 
-from pystdf.IO import Parser
+from pystdf.Parse import Parser
 from pystdf.Mapping import *
+from pystdf.Sidecar import FileIndex
 from pystdf.Writers import *
 
 from record_pos_table import RecordPositionTable
@@ -237,13 +238,20 @@ class MainFrame(wx.Frame):
             if dlg.ShowModal() == wx.ID_OK:
                 filename = dlg.GetPath()
                 
-                # Set up the mapping parser
-                self.map_stream = open(filename, 'rb')
-                parser = Parser(inp=self.map_stream)
-                self.record_mapper = StreamMapper()
-                parser.addSink(self.record_mapper)
-                material_mapper = MaterialMapper()
-                parser.addSink(material_mapper)
+                # A sidecar index saved by an earlier run spares mapping the file
+                index = FileIndex.load(filename)
+                if index is not None:
+                    self.map_stream = None
+                    self.record_mapper = StreamMapper.fromIndex(index)
+                    material_mapper = MaterialMapper.fromIndex(index)
+                else:
+                    # Set up the mapping parser
+                    self.map_stream = open(filename, 'rb')
+                    parser = Parser(inp=self.map_stream)
+                    self.record_mapper = StreamMapper()
+                    parser.addSink(self.record_mapper)
+                    material_mapper = MaterialMapper()
+                    parser.addSink(material_mapper)
                 self.recordPositionList.record_mapper = self.record_mapper
                 self.recordPositionList.material_mapper = material_mapper
                 
@@ -254,8 +262,12 @@ class MainFrame(wx.Frame):
                 self.view_parser.addSink(self.record_keeper)
                 self.view_parser.parse(1)
                 
-                # Parse the file in a separate thread
-                self.mapper = MapperThread(self, parser)
+                if index is not None:
+                    self.mapper = None
+                    self.recordPositionList.SetItemCount(len(self.record_mapper.indexes))
+                else:
+                    # Parse the file in a separate thread
+                    self.mapper = MapperThread(self, parser)
         
         finally:
             dlg.Destroy()
@@ -47,10 +47,10 @@ class RecordPositionListCtrl(wx.ListCtrl):
             elif col == 1:
                 return self.__record_mapper.types[item].__class__.__name__
             elif col == 2:
-                return str(self.__material_mapper.waferid[item])
+                return str(self.__material_mapper.waferIds[item])
             elif col == 3:
-                return str(self.__material_mapper.insertionid[item])
+                return str(self.__material_mapper.insertionIds[item])
             elif col == 4:
-                return str(self.__material_mapper.partid[item])
+                return str(self.__material_mapper.partIds[item])
         return ''
     
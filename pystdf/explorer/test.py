@@ -20,7 +20,7 @@
 import  wx
 import  wx.grid as  gridlib
 
-from pystdf.IO import Parser
+from pystdf.Parse import Parser
 from pystdf.Mapping import *
 from pystdf.Writers import *
 
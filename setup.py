@@ -45,7 +45,7 @@ PySTDF is released under a GPL license. Applications developed with PySTDF can o
     url='http://code.google.com/p/pystdf/',
     packages=['pystdf','pystdf.explorer', 'pyatdf'],
     scripts=['scripts/stdf_slice', 'scripts/rec_index', 'scripts/stdf2atdf', 
-             'scripts/stdf2xml'],
+             'scripts/stdf2xml', 'scripts/stdf_batch'],
     classifiers=[
       'Development Status :: 4 - Beta',
       'Environment :: Console',
@@ -0,0 +1,89 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+"""
+Writes small generated STDF files for the tests: wafers of round dies tested a touchdown of
+sites at a time, each part with Ptrs and an Mpr (nibble and float arrays), a Dtr after each
+Prr and a few dies retested at the end of each wafer.
+"""
+
+from pystdf import IO, V4
+from pystdf.Writer import StdfWriter
+
+TESTS = (100, 101, 102)
+MPR_TEST = 200
+
+def dies(radius):
+    return [(x, y) for y in range(-radius, radius + 1) for x in range(-radius, radius + 1)
+            if x * x + y * y <= radius * radius]
+
+def ptr(testNum, site, result, first):
+    return V4.Ptr(TEST_NUM=testNum, HEAD_NUM=1, SITE_NUM=site, TEST_FLG=0 if result < 0.9 else 0x80,
+                  PARM_FLG=0, RESULT=result, TEST_TXT='test %d' % testNum if first else '', ALARM_ID='',
+                  OPT_FLAG=0 if first else 0xce, RES_SCAL=0, LLM_SCAL=0, HLM_SCAL=0,
+                  LO_LIMIT=0.1 if first else 0.0, HI_LIMIT=0.9 if first else 0.0, UNITS='V' if first else '',
+                  C_RESFMT='', C_LLMFMT='', C_HLMFMT='', LO_SPEC=0.0, HI_SPEC=1.0)
+
+def mpr(site, results):
+    return V4.Mpr(TEST_NUM=MPR_TEST, HEAD_NUM=1, SITE_NUM=site, TEST_FLG=0, PARM_FLG=0,
+                  RTN_ICNT=len(results), RSLT_CNT=len(results), RTN_STAT=[n % 16 for n in range(len(results))],
+                  RTN_RSLT=results, TEST_TXT='multi', ALARM_ID='', OPT_FLAG=0, RES_SCAL=0, LLM_SCAL=0,
+                  HLM_SCAL=0, LO_LIMIT=0.0, HI_LIMIT=1.0, START_IN=0.0, INCR_IN=0.0,
+                  RTN_INDX=range(1, len(results) + 1), UNITS='A', UNITS_IN='V', C_RESFMT='', C_LLMFMT='',
+                  C_HLMFMT='', LO_SPEC=0.0, HI_SPEC=1.0)
+
+def writeParts(fileName, wafers=2, radius=4, sites=4, endian='<', retests=3):
+    """
+    Writes the file and returns its part count
+    """
+    out = open(fileName, 'wb')
+    writer = StdfWriter(out, IO.Codec(endian))
+    writer.writeRecord(V4.Far(CPU_TYPE=2 if endian == '<' else 1, STDF_VER=4))
+    writer.writeRecord(V4.Mir(SETUP_T=0, START_T=0, STAT_NUM=1, MODE_COD='P', RTST_COD=' ', PROT_COD=' ',
+                              BURN_TIM=65535, CMOD_COD=' ', LOT_ID='LOT', PART_TYP='T', NODE_NAM='n',
+                              TSTR_TYP='t', JOB_NAM='j'))
+    parts, count = dies(radius), 0
+    for wafer in range(wafers):
+        writer.writeRecord(V4.Wir(HEAD_NUM=1, SITE_GRP=255, START_T=0, WAFER_ID='W%d' % wafer))
+        tested = parts + parts[wafer:wafer + retests]
+        for start in range(0, len(tested), sites):
+            touchdown = tested[start:start + sites]
+            for site in range(1, len(touchdown) + 1):
+                writer.writeRecord(V4.Pir(HEAD_NUM=1, SITE_NUM=site))
+            for site, (x, y) in enumerate(touchdown, 1):
+                for testNum in TESTS:
+                    writer.writeRecord(ptr(testNum, site, ((x + y + testNum + count) % 10) / 10.0, count == 0))
+                writer.writeRecord(mpr(site, [float(x), float(y), 0.5]))
+            for site, (x, y) in enumerate(touchdown, 1):
+                count += 1
+                hardBin = 1 + (x * 3 + y + wafer) % 3
+                writer.writeRecord(V4.Prr(HEAD_NUM=1, SITE_NUM=site, PART_FLG=0, NUM_TEST=len(TESTS) + 1,
+                                          HARD_BIN=hardBin, SOFT_BIN=hardBin + 10, X_COORD=x, Y_COORD=y,
+                                          TEST_T=1, PART_ID=str(count), PART_TXT='', PART_FIX=[]))
+                writer.writeRecord(V4.Dtr(TEXT_DAT='part %d' % count))
+        writer.writeRecord(V4.Wrr(HEAD_NUM=1, SITE_GRP=255, FINISH_T=0, PART_CNT=len(tested), RTST_CNT=retests,
+                                  ABRT_CNT=0, GOOD_CNT=0, FUNC_CNT=0, WAFER_ID='W%d' % wafer, FABWF_ID='',
+                                  FRAME_ID='', MASK_ID='', USR_DESC='', EXC_DESC=''))
+    for hardBin in (1, 2, 3):
+        writer.writeRecord(V4.Hbr(HEAD_NUM=255, SITE_NUM=0, HBIN_NUM=hardBin, HBIN_CNT=1, HBIN_PF='P', HBIN_NAM='b'))
+    writer.writeRecord(V4.Mrr(FINISH_T=0, DISP_COD=' ', USR_DESC='', EXC_DESC=''))
+    writer.flush()
+    out.close()
+    return count
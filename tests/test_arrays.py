@@ -0,0 +1,88 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from pystdf import IO, Parse
+import stdfdata
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'tfile.std')
+
+class ArrayFieldTest(unittest.TestCase):
+    def codecs(self):
+        yield IO.Codec('<')
+        if IO.have_numpy:
+            yield IO.Codec('<', numpyArrays=True)
+
+    def test_nibbles(self):
+        for count in (0, 1, 2, 5, 6):
+            nibbles = [(n * 7) % 16 for n in range(count)]
+            padded = nibbles + [0] * (count % 2)
+            buf = 'x' + ''.join(chr(low | high << 4) for low, high in zip(padded[0::2], padded[1::2]))
+            for codec in self.codecs():
+                rln, values, offset = IO.readNibbleArray(codec, buf, 1, count, 'N1')
+                self.assertEqual(list(values), nibbles)
+                self.assertEqual(offset, 1 + (count + 1) // 2)
+
+    def test_fixed_width_items(self):
+        for arrayFmt, fmt, items in (('U2', 'H', [1, 2, 65535]), ('R4', 'f', [0.5, -2.0, 8.25]),
+                                     ('U1', 'B', [7]), ('U2', 'H', [])):
+            buf = 'xx' + struct.pack('<%d%s' % (len(items), fmt), *items)
+            for codec in self.codecs():
+                rln, values, offset = IO.readArray(codec, buf, 2, len(items), arrayFmt, None, None)
+                self.assertEqual(list(values), items)
+                self.assertEqual(offset, len(buf))
+                if codec.numpyArrays:
+                    self.assertEqual(values.dtype.char, fmt)
+
+class ArrayRecordTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        stdfdata.writeParts(self.fileName, wafers=1, radius=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_mpr_lists(self):
+        for mpr in Parse.Reader(self.fileName).records({'Mpr'}):
+            self.assertEqual(mpr.values[mpr.RTN_STAT], [0, 1, 2])       # an odd count of nibbles
+            self.assertEqual(mpr.values[mpr.RTN_INDX], [1, 2, 3])
+            self.assertEqual(len(mpr.values[mpr.RTN_RSLT]), 3)
+            self.assertEqual(mpr.values[mpr.RTN_RSLT][2], 0.5)
+
+    @unittest.skipUnless(IO.have_numpy, 'NumPy is not installed')
+    def test_numpy_arrays_match_lists(self):
+        for fileName in (self.fileName, DATA):
+            for record, other in zip(Parse.Reader(fileName), Parse.Reader(fileName, numpyArrays=True)):
+                for field in record.fields():
+                    value, array = record.values[field.index], other.values[field.index]
+                    if field.arrayFmt and field.arrayFmt in ('N1', 'U1', 'U2', 'R4'):
+                        self.assertEqual(type(array).__name__, 'ndarray', (record.name, field.name))
+                        self.assertEqual(array.tolist(), value, (record.name, field.name))
+                    else:
+                        self.assertEqual(array, value, (record.name, field.name))
+
+if __name__ == '__main__':
+    unittest.main()
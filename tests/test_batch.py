@@ -0,0 +1,53 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import Batch
+from pystdf.Writer import AtdfWriter
+
+class KeepStreams(Batch.WriterFactory):
+    def __init__(self, outDir):
+        Batch.WriterFactory.__init__(self, AtdfWriter, 'atdf', outDir)
+        self.streams = []
+
+    def __call__(self, fileName):
+        sinks = Batch.WriterFactory.__call__(self, fileName)
+        self.streams.extend(sink.stream for sink in sinks)
+        return sinks
+
+class ProcessOneTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_failed_file_closes_its_streams(self):
+        factory = KeepStreams(self.dir)
+        fileResult = Batch.processOne((os.path.join(self.dir, 'missing.std'), factory, None, {}))
+        self.assertTrue(fileResult.error)
+        self.assertTrue(all(stream.closed for stream in factory.streams))
+
+if __name__ == '__main__':
+    unittest.main()
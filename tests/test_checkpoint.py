@@ -0,0 +1,64 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import StringIO
+import tempfile
+import unittest
+
+from pystdf import Checkpoint, Parse
+from pystdf.Batch import RecordCounter
+from pystdf.Writer import AtdfWriter
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'tfile.std')
+
+class CheckpointResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'tfile.std')
+        shutil.copy(DATA, self.fileName)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def atdf(self, counter):
+        out = StringIO.StringIO()
+        Parse.process_file(self.fileName, [counter, AtdfWriter(out)], checkpoint=True)
+        return out.getvalue()
+
+    def test_unaware_sink_parses_from_the_beginning(self):
+        first = self.atdf(RecordCounter())
+        self.assertTrue(first)
+        self.assertEqual(Checkpoint.load(self.fileName + '.ckpt')['unawareTypes'], ['AtdfWriter'])
+        counter = RecordCounter()
+        self.assertEqual(self.atdf(counter), first)
+        self.assertEqual(sum(counter.counts.values()), first.count('\n'))
+
+    def test_aware_sinks_resume(self):
+        first = RecordCounter()
+        Parse.process_file(self.fileName, [first], checkpoint=True)
+        resumed = RecordCounter()
+        Parse.process_file(self.fileName, [resumed], checkpoint=True)
+        self.assertEqual(resumed.counts, first.counts)
+        self.assertTrue(Checkpoint.load(self.fileName + '.ckpt')['offset'] > 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import IO, Parse
+from pystdf.Writer import StdfWriter
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'tfile.std')
+
+def interpreted(codec, record):
+    """
+    Decodes the record again by interpreting its field map
+    """
+    other = record.copy()
+    other.values = [None] * len(other.values)
+    IO.decodeFields(codec, other, other.fields())
+    return other.values
+
+class CompiledDecoderTest(unittest.TestCase):
+    def checkDecoders(self, fileName):
+        reader = Parse.Reader(fileName)
+        compiled = [record for record in reader if record._decoders.get(reader.codec.endian)]
+        self.assertTrue(len(compiled) > 20)          # all but the Gdrs, their Vn fields are interpreted
+        for record in compiled:
+            self.assertEqual(record.values, interpreted(reader.codec, record), record.name)
+
+    def test_compiled_matches_interpreted(self):
+        self.checkDecoders(DATA)
+
+    def test_big_endian(self):
+        dir = tempfile.mkdtemp()
+        try:
+            self.checkDecoders(swapped(DATA, dir))
+        finally:
+            shutil.rmtree(dir)
+
+def swapped(fileName, dir):
+    """
+    Writes the records of the file big endian, returns the new file name
+    """
+    swappedName = os.path.join(dir, 'swapped.std')
+    with open(swappedName, 'wb') as out:
+        writer = StdfWriter(out, IO.Codec('>'))
+        for record in Parse.Reader(fileName):
+            if record.name == 'Far':
+                record.values[record.CPU_TYPE] = 1
+            writer.writeRecord(record)
+        writer.flush()
+    return swappedName
+
+class CodecTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.swapped = swapped(DATA, self.dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def values(self, record):
+        return [value for name, value in zip(record.fieldMap, record.values) if name[0] != 'CPU_TYPE']
+
+    def test_byte_orders_decode_alike(self):
+        self.assertEqual(Parse.Reader(self.swapped).codec.endian, '>')
+        self.assertEqual([self.values(record) for record in Parse.Reader(self.swapped)],
+                         [self.values(record) for record in Parse.Reader(DATA)])
+
+    def test_readers_side_by_side(self):
+        little, big = Parse.Reader(DATA), Parse.Reader(self.swapped)
+        for record, other in zip(little, big):          # each reader decodes with its own codec
+            self.assertEqual((record.name, self.values(record)), (other.name, self.values(other)))
+        self.assertEqual((little.readRecord(), big.readRecord()), (None, None))
+
+    def test_parsers_side_by_side(self):
+        outputs = []
+        for n, fileName in enumerate((DATA, self.swapped)):
+            outName = os.path.join(self.dir, 'out%d.std' % n)
+            parser = Parse.Parser(inp=open(fileName, 'rb'))
+            writer = StdfWriter(open(outName, 'wb'))        # follows the byte order of its parser
+            parser.addSink(writer)
+            outputs.append((parser, writer, fileName, outName))
+        for parser, writer, fileName, outName in outputs:
+            parser.parse()
+            writer.stream.close()
+        for parser, writer, fileName, outName in outputs:
+            self.assertEqual(Parse.Reader(outName).codec.endian, parser.codec.endian)
+            self.assertEqual([record.values for record in Parse.Reader(outName)],
+                             [record.values for record in Parse.Reader(fileName)])
+
+if __name__ == '__main__':
+    unittest.main()
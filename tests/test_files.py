@@ -0,0 +1,112 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import bz2
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from pystdf import IO
+import stdfdata
+
+class Unseekable(object):
+    """
+    A pipe: read only
+    """
+    def __init__(self, fileName):
+        self.file = open(fileName, 'rb')
+        self.read = self.file.read
+
+    def close(self):
+        self.file.close()
+
+class FileTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        stdfdata.writeParts(self.fileName, wafers=1, radius=3)
+        self.raw = open(self.fileName, 'rb').read()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def checkSequential(self, inp, sizes=(4, 1, 300, 0, 2000, 7)):
+        pos = 0
+        while pos < len(self.raw):
+            for size in sizes:
+                self.assertEqual(str(inp.read(size)), self.raw[pos:pos + size])
+                pos = min(pos + size, len(self.raw))
+                self.assertEqual(inp.tell(), pos)
+        self.assertEqual(str(inp.read(10)), '')
+        self.assertEqual(inp.tell(), len(self.raw))
+
+    def checkRandom(self, inp, whences=(0, 1, 2)):
+        rnd, size = random.Random(1), len(self.raw)
+        pos = 0
+        for i in range(300):
+            whence = rnd.choice(whences)
+            target = rnd.randrange(size + 1)
+            inp.seek(target - (0, pos, size)[whence], whence)
+            pos = target
+            self.assertEqual(inp.tell(), pos)
+            count = rnd.randrange(1, 3000)
+            self.assertEqual(str(inp.read(count)), self.raw[pos:pos + count])
+            pos = min(pos + count, size)
+            self.assertEqual(inp.tell(), pos)
+        inp.seek(0)
+        self.assertEqual(str(inp.read()), self.raw)
+        self.assertEqual(inp.tell(), size)
+
+    def test_mapped_file(self):
+        with IO.MappedFile(self.fileName) as inp:
+            self.checkSequential(inp)
+            self.checkRandom(inp)
+
+    def test_block_reader(self):
+        for blockSize in (1, 100, 4096, None):
+            inp = IO.BlockReader(open(self.fileName, 'rb'), blockSize)
+            self.checkSequential(inp)
+            self.checkRandom(inp)
+            inp.close()
+
+    def test_block_reader_bz2(self):
+        bz2Name = self.fileName + '.bz2'
+        out = bz2.BZ2File(bz2Name, 'wb')
+        out.write(self.raw)
+        out.close()
+        inp = IO.BlockReader(bz2.BZ2File(bz2Name), 1000)
+        self.checkSequential(inp)
+        self.checkRandom(inp, (0, 1))
+        inp.close()
+
+    def test_block_reader_pipe(self):
+        inp = IO.BlockReader(Unseekable(self.fileName), 1000)
+        self.assertFalse(IO.seekable(inp.inp))
+        for pos, size in ((0, 6), (0, 6), (3, 100), (10, 5), (990, 20), (1005, 1)):
+            inp.seek(pos)           # within the block read ahead
+            self.assertEqual(inp.read(size), self.raw[pos:pos + size])
+            self.assertEqual(inp.tell(), pos + size)
+        self.assertEqual(inp.read(), self.raw[1006:])
+        inp.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import gzip
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from pystdf import IO, Parse
+import stdfdata
+
+class GzipAccessPointsTest(unittest.TestCase):
+    spacing = 4096
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        stdfdata.writeParts(self.fileName, radius=8)
+        self.raw = open(self.fileName, 'rb').read()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def compress(self, members):
+        gzName = self.fileName + '.gz'
+        start = 0
+        for end in members + [len(self.raw)]:
+            out = gzip.open(gzName, 'ab')
+            out.write(self.raw[start:end])
+            out.close()
+            start = end
+        return gzName
+
+    def checkSeeks(self, gzName):
+        points = IO.GzipAccessPoints(gzName, self.spacing)
+        self.assertEqual(points.read(), self.raw)
+        offsets = [point[0] for point in points.points]
+        self.assertEqual(offsets, range(0, len(self.raw), self.spacing))      # points land every spacing bytes
+        reader = IO.BlockReader(IO.GzipAccessPoints(gzName, self.spacing))
+        reader.read()
+        rnd = random.Random(1)
+        for i in range(200):
+            offset, size = rnd.randrange(len(self.raw)), rnd.randrange(1, 3 * self.spacing)
+            reader.seek(offset)
+            self.assertEqual(reader.read(size), self.raw[offset:offset + size])
+            self.assertEqual(reader.tell(), min(offset + size, len(self.raw)))
+
+    def test_spacing(self):
+        self.checkSeeks(self.compress([]))
+
+    def test_members_and_padding(self):
+        gzName = self.compress([len(self.raw) // 3])
+        open(gzName, 'ab').write('\0' * 100)
+        self.checkSeeks(gzName)
+
+    def test_reader_writes_no_index(self):
+        gzName = self.compress([])
+        records = [(record.name, list(record.values)) for record in Parse.Reader(gzName)]
+        self.assertEqual(records, [(record.name, list(record.values)) for record in Parse.Reader(self.fileName)])
+        self.assertFalse(os.path.exists(gzName + '.gzidx'))
+
+if __name__ == '__main__':
+    unittest.main()
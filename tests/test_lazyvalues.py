@@ -0,0 +1,86 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import copy
+import cPickle
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import IO, Parse
+import stdfdata
+
+class LazyValuesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        stdfdata.writeParts(self.fileName, wafers=1, radius=2)
+        self.expected = [list(record.values) for record in Parse.Reader(self.fileName) if record.name == 'Ptr']
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def lazyPtrs(self):
+        ptrs = [record for record in Parse.Reader(self.fileName, wanted={'Ptr': ['TEST_NUM']})
+                if record.name == 'Ptr']
+        for ptr in ptrs:
+            self.assertTrue(isinstance(ptr.values, IO.LazyValues))
+            self.assertEqual(list.__getitem__(ptr.values, ptr.RESULT), None)       # not decoded yet
+        return ptrs
+
+    def test_index(self):
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            self.assertEqual(ptr.values[ptr.TEST_NUM], expected[ptr.TEST_NUM])
+            self.assertEqual(ptr.values[ptr.RESULT], expected[ptr.RESULT])
+            self.assertEqual(ptr.values[-1], expected[-1])
+
+    def test_slices(self):
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            self.assertEqual(ptr.values[ptr.RESULT:ptr.TEST_TXT + 1], expected[ptr.RESULT:ptr.TEST_TXT + 1])
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            self.assertEqual(ptr.values[::2], expected[::2])
+
+    def test_iteration(self):
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            self.assertEqual([value for value in ptr.values], expected)
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            self.assertEqual(list(reversed(ptr.values)), expected[::-1])
+            self.assertTrue(expected[ptr.TEST_TXT] in ptr.values)
+
+    def test_assignment_is_kept(self):
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            ptr.values[ptr.RESULT] = -1.0
+            self.assertEqual(ptr.values[ptr.RESULT], -1.0)
+            self.assertEqual(ptr.values[ptr.TEST_TXT], expected[ptr.TEST_TXT])
+            self.assertEqual(ptr.values[ptr.RESULT], -1.0)
+
+    def test_copies_are_decoded(self):
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            copied = copy.copy(ptr.values)
+            self.assertEqual(type(copied), list)
+            self.assertEqual(copied, expected)
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            self.assertEqual(copy.deepcopy(ptr.values), expected)
+        for ptr, expected in zip(self.lazyPtrs(), self.expected):
+            self.assertEqual(cPickle.loads(cPickle.dumps(ptr.values, 2)), expected)
+
+if __name__ == '__main__':
+    unittest.main()
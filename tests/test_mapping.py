@@ -0,0 +1,114 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import Parse, Sidecar, V4
+from pystdf.Indexing import StreamIndexer
+from pystdf.Mapping import IdList, MaterialMapper, NO_ID, RecordList, StreamMapper
+import stdfdata
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'tfile.std')
+
+class ListStreamMapper(StreamIndexer):
+    "The list based StreamMapper the arrays replaced"
+    def __init__(self):
+        self.indexes = []
+        self.records = []
+
+    def before_header(self, dataSource, header):
+        super(ListStreamMapper, self).before_header(dataSource, header)
+        self.indexes.append(self.position)
+        self.records.append(V4.recordByType(self.header.typ, self.header.sub))
+
+class ListMaterialMapper(MaterialMapper):
+    "MaterialMapper keeping its ids in lists as it used to"
+    def before_begin(self, dataSource):
+        MaterialMapper.before_begin(self, dataSource)
+        self.waferIds, self.insertionIds, self.partIds = [], [], []
+
+def mapped(fileName):
+    mappers = [StreamMapper(), MaterialMapper(), ListStreamMapper(), ListMaterialMapper()]
+    with open(fileName, 'rb') as inp:
+        parser = Parse.Parser(inp=inp)
+        for mapper in mappers:
+            parser.addSink(mapper)
+        parser.parse()
+    return mappers
+
+def recordTypes(records):
+    return [type(record) for record in records]
+
+class MapperTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        stdfdata.writeParts(self.fileName, wafers=2, radius=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def checkStream(self, mapper, expected):
+        self.assertEqual(list(mapper.indexes), expected.indexes)
+        self.assertEqual(len(mapper.records), len(expected.records))
+        self.assertEqual(recordTypes(mapper.records), recordTypes(expected.records))
+        self.assertEqual(recordTypes(mapper.types[3:10]), recordTypes(expected.records[3:10]))
+        self.assertEqual(mapper.types[-1].__class__.__name__, expected.records[-1].__class__.__name__)
+
+    def checkMaterial(self, mapper, expected):
+        for name in ('waferIds', 'insertionIds', 'partIds'):
+            ids, expectedIds = getattr(mapper, name), getattr(expected, name)
+            self.assertEqual(list(ids), expectedIds, name)
+            self.assertEqual(len(ids), len(expectedIds))
+            self.assertEqual(ids[5:20], expectedIds[5:20])
+            self.assertEqual([ids[ndx] for ndx in range(len(ids))], expectedIds)
+
+    def test_parsed(self):
+        for fileName in (DATA, self.fileName):
+            streamMapper, materialMapper, expectedStream, expectedMaterial = mapped(fileName)
+            self.checkStream(streamMapper, expectedStream)
+            self.checkMaterial(materialMapper, expectedMaterial)
+            self.assertTrue(None in expectedMaterial.partIds)
+
+    def test_from_index(self):
+        index = Sidecar.buildIndex(self.fileName)
+        streamMapper, materialMapper, expectedStream, expectedMaterial = mapped(self.fileName)
+        self.checkStream(StreamMapper.fromIndex(index), expectedStream)
+        self.checkMaterial(MaterialMapper.fromIndex(index), expectedMaterial)
+
+    def test_id_list(self):
+        ids = IdList()
+        for value in (3, None, 0, None):
+            ids.append(value)
+        self.assertEqual(list(ids), [3, None, 0, None])
+        self.assertEqual(list(ids.ids), [3, NO_ID, 0, NO_ID])
+        self.assertEqual((ids[1], ids[-2], ids[1:]), (None, 0, [None, 0, None]))
+
+    def test_record_list_shares_records(self):
+        records = RecordList(StreamMapper().codes)
+        records.codes.extend([V4.Ptr.typ << 8 | V4.Ptr.sub] * 2)
+        self.assertTrue(records[0] is records[1])
+        self.assertEqual(records[0].__class__.__name__, 'Ptr')
+
+if __name__ == '__main__':
+    unittest.main()
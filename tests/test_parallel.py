@@ -0,0 +1,71 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import sys
+import StringIO
+import tempfile
+import unittest
+
+from pystdf import Parallel, Parse
+from pystdf.BinSummarizer import BinSummarizer
+from pystdf.TestSummarizer import TestSummarizer
+import stdfdata
+
+class Downstream(object):
+    def __init__(self):
+        self.ready = 0
+
+    def after_binSummaryReady(self, source, dataSource):
+        self.ready += 1
+
+class ParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        stdfdata.writeParts(self.fileName, wafers=3, radius=6)
+        self.stdout, sys.stdout = sys.stdout, StringIO.StringIO()   # the summarizers print when ready
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+        shutil.rmtree(self.dir)
+
+    def summarize(self, **options):
+        sinks = [BinSummarizer(), TestSummarizer()]
+        Parse.process_file(self.fileName, sinks, **options)
+        return sinks
+
+    def test_parallel_matches_serial(self):
+        (serialBins, serialTests), (bins, tests) = self.summarize(), self.summarize(jobs=2)
+        self.assertEqual(bins.hbinParts, serialBins.hbinParts)
+        self.assertEqual(tests.testExecs, serialTests.testExecs)
+        self.assertEqual(tests.testFails, serialTests.testFails)
+
+    def test_sink_with_sinks_parses_serially(self):
+        summarizer, downstream = BinSummarizer(), Downstream()
+        summarizer.addSink(downstream)
+        self.assertFalse(Parallel.picklable([summarizer]))
+        Parse.process_file(self.fileName, [summarizer], jobs=2)
+        self.assertEqual(downstream.ready, 1)
+        self.assertEqual(summarizer.hbinParts, self.summarize()[0].hbinParts)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import Parse
+from pystdf.V4 import Prr
+from pystdf.Indexing import MaterialIndexer
+import stdfdata
+
+PART_RECORDS = ('Pir', 'Ptr', 'Mpr', 'Ftr', 'Prr')
+
+class PartGrouper(MaterialIndexer):
+    """
+    The records of each part as MaterialIndexer numbers them
+    """
+    def __init__(self):
+        MaterialIndexer.__init__(self)
+        self.parts = dict()
+
+    def before_send(self, dataSource, record):
+        MaterialIndexer.before_send(self, dataSource, record)
+        if record.name in PART_RECORDS:
+            part = self.getCurrentPart(record.values[record.HEAD_NUM], record.values[record.SITE_NUM])
+            self.parts.setdefault(part, []).append((record.name, list(record.values)))
+
+def rows(records):
+    return [(record.name, list(record.values)) for record in records]
+
+class PartIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.fileName = os.path.join(cls.dir, 'parts.std')
+        cls.count = stdfdata.writeParts(cls.fileName)
+        grouper = PartGrouper()
+        Parse.process_file(cls.fileName, [grouper])
+        cls.expected = grouper.parts
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+
+    def test_part_records(self):
+        reader = Parse.Reader(self.fileName)
+        self.assertEqual(len(reader.partIndex()), self.count)
+        for part in range(1, self.count + 1):
+            self.assertEqual(rows(reader.partRecords(part)), self.expected[part])
+
+    def test_part_records_after_iteration(self):
+        reader = Parse.Reader(self.fileName)
+        self.assertTrue(list(reader))
+        for part in (1, self.count // 2, self.count):
+            self.assertEqual(rows(reader.partRecords(part)), self.expected[part])
+
+    def test_part_records_by_type(self):
+        reader = Parse.Reader(self.fileName)
+        self.assertEqual(rows(reader.partRecords(5, ('Prr',))),
+                         [row for row in self.expected[5] if row[0] == 'Prr'])
+
+    def test_part_info_and_find(self):
+        index = Parse.Reader(self.fileName).partIndex()
+        prr = self.expected[7][-1][1]
+        info = index.part(7)
+        self.assertEqual((info.x, info.y, info.hardBin, info.partId), (prr[Prr.X_COORD], prr[Prr.Y_COORD], prr[Prr.HARD_BIN], prr[Prr.PART_ID]))
+        self.assertEqual(index.find(partId='7'), [7])
+        self.assertEqual(index.find(site=2, waferId=2),
+                         [part for part in range(1, self.count + 1)
+                          if index.part(part).site == 2 and index.part(part).waferId == 2])
+        self.assertEqual(index.find(partId='missing'), [])
+        self.assertEqual(sorted(index.wafers.values()), ['W0', 'W1'])
+
+if __name__ == '__main__':
+    unittest.main()
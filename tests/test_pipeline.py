@@ -0,0 +1,58 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import unittest
+
+from pystdf.Pipeline import DataSource
+
+class Collector(object):
+    def __init__(self, recordTypes=None):
+        if recordTypes is not None:
+            self.recordTypes = recordTypes
+        self.sent = []
+
+    def after_send(self, _, data):
+        self.sent.append(data)
+
+class Named(object):
+    def __init__(self, name):
+        self.name = name
+
+class RoutedSendTest(unittest.TestCase):
+    def test_data_without_name_reaches_every_sink(self):
+        source, plain, restricted = DataSource([]), Collector(), Collector(('Prr',))
+        source.addSink(plain)
+        source.addSink(restricted)
+        source.send(('Prr', [1, 2]))
+        self.assertEqual(plain.sent, [('Prr', [1, 2])])
+        self.assertEqual(restricted.sent, [('Prr', [1, 2])])
+
+    def test_records_are_routed_by_name(self):
+        source, plain, restricted = DataSource([]), Collector(), Collector(('Prr',))
+        source.addSink(plain)
+        source.addSink(restricted)
+        pir, prr = Named('Pir'), Named('Prr')
+        source.send(pir)
+        source.send(prr)
+        self.assertEqual(plain.sent, [pir, prr])
+        self.assertEqual(restricted.sent, [prr])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import gc
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import Parse
+import stdfdata
+
+class ReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        stdfdata.writeParts(self.fileName, wafers=1, radius=3)
+        self.all = [(record.name, record.values) for record in Parse.Reader(self.fileName)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_records_by_type(self):
+        for types in ({'Prr'}, {'Pir', 'Ptr'}, {'Far', 'Mrr'}, set()):
+            records = [(record.name, record.values) for record in Parse.Reader(self.fileName).records(types)]
+            self.assertEqual(records, [(name, values) for name, values in self.all if name in types])
+        records = [(record.name, record.values) for record in Parse.Reader(self.fileName).records()]
+        self.assertEqual(records, self.all)
+
+    def test_batches(self):
+        for size in (1, 7, len(self.all), len(self.all) + 1):
+            batches = list(Parse.Reader(self.fileName).batches(size))
+            self.assertTrue(all(len(batch) == size for batch in batches[:-1]))
+            self.assertTrue(0 < len(batches[-1]) <= size)
+            self.assertEqual([(record.name, record.values) for batch in batches for record in batch], self.all)
+
+    def test_batches_by_type(self):
+        prrs = [(name, values) for name, values in self.all if name == 'Prr']
+        batches = list(Parse.Reader(self.fileName).batches(10, {'Prr'}))
+        self.assertEqual(len(batches), (len(prrs) + 9) // 10)
+        self.assertEqual([(record.name, record.values) for batch in batches for record in batch], prrs)
+        self.assertEqual(list(Parse.Reader(self.fileName).batches(10, {'Tsr'})), [])
+
+    def test_mixed_reads(self):
+        reader = Parse.Reader(self.fileName)
+        self.assertEqual(reader.readRecord().name, 'Far')
+        first = reader.readRecord({'Prr'})
+        self.assertEqual((first.name, first.values), [item for item in self.all if item[0] == 'Prr'][0])
+        rest = [(record.name, record.values) for record in reader]
+        self.assertEqual(rest, self.all[self.all.index((first.name, first.values)) + 1:])
+
+class MappedReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        stdfdata.writeParts(self.fileName)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_records_outlive_iteration(self):
+        expected = [(record.name, list(record.values)) for record in Parse.Reader(self.fileName)]
+        records = list(Parse.Reader(self.fileName, mapped=True, wanted={'Ptr': ['TEST_NUM']}))
+        gc.collect()
+        ptr = [record for record in records if record.name == 'Ptr'][0]
+        self.assertEqual(ptr.values[ptr.TEST_TXT], 'test 100')      # decoded on access after the end of the file
+        self.assertEqual(len(str(ptr.buffer)), ptr.header.len)
+        self.assertEqual([(record.name, list(record.values)) for record in records], expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import unittest
+
+from pystdf import Parse
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'tfile.std')
+
+class Keeper(object):
+    def __init__(self):
+        self.kept = []
+        self.copies = []
+
+    def after_send(self, _, record):
+        self.kept.append(record)
+        self.copies.append(record.copy())
+
+def parse(**options):
+    keeper = Keeper()
+    with open(DATA, 'rb') as inp:
+        parser = Parse.Parser(inp=inp, **options)
+        parser.addSink(keeper)
+        parser.parse()
+    return keeper
+
+def contents(records):
+    return [(record.name, [field[0] for field in record.fieldMap], list(record.values)) for record in records]
+
+class RecycleTest(unittest.TestCase):
+    def test_instances_are_reused(self):
+        keeper = parse(recycle=True)
+        gdrs = [record for record in keeper.kept if record.name == 'Gdr']
+        self.assertTrue(len(gdrs) > 1)
+        self.assertTrue(all(gdr is gdrs[0] for gdr in gdrs))
+        self.assertEqual(len(set(map(id, keeper.kept))), len(set(record.name for record in keeper.kept)))
+
+    def test_copies_match_a_plain_parse(self):
+        plain = parse()
+        self.assertEqual(contents(parse(recycle=True).copies), contents(plain.kept))
+        self.assertEqual(contents(plain.copies), contents(plain.kept))
+
+    def test_copies_are_independent(self):
+        keeper = parse()
+        for record, other in zip(keeper.kept, keeper.copies):
+            self.assertFalse(other is record)
+            self.assertFalse(other.values is record.values)
+            if record.values:           # Eps has no fields
+                other.values[0] = 'changed'
+                self.assertNotEqual(record.values[0], 'changed')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+
+from pystdf import IO, Parse, Scanner
+import stdfdata
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'tfile.std')
+
+def decoded(fileName):
+    """
+    The (offset, body length, typ, sub) of each record, read with a Reader
+    """
+    reader = Parse.Reader(fileName, lazy=set())
+    headers, offset = [], reader.tell()
+    for record in reader:
+        headers.append((offset, record.header.len, record.typ, record.sub))
+        offset = reader.tell()
+    return headers
+
+class ScanHeadersTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        self.parts = stdfdata.writeParts(self.fileName, wafers=1, radius=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def scans(self, fileName):
+        for inp in (open(fileName, 'rb'), IO.MappedFile(fileName)):
+            yield Scanner.scanHeaders(inp)
+            inp.close()
+
+    def test_headers_and_counts(self):
+        for fileName in (DATA, self.fileName):
+            headers = decoded(fileName)
+            counts, sizes = Counter(), Counter()
+            for offset, length, typ, sub in headers:
+                counts[(typ, sub)] += 1
+                sizes[(typ, sub)] += length
+            for index in self.scans(fileName):
+                self.assertEqual(list(index), headers)
+                self.assertEqual(index.counts(), dict((key, (count, sizes[key])) for key, count in counts.items()))
+
+    def test_names(self):
+        index = Scanner.scanHeaders(open(self.fileName, 'rb'))
+        names = Counter(index.name(ndx) for ndx in range(len(index)))
+        self.assertEqual(names['Prr'], self.parts)
+        self.assertEqual(names['Ptr'], names['Prr'] * len(stdfdata.TESTS))
+        self.assertEqual((names['Far'], names['Mrr']), (1, 1))
+
+    def test_truncated_record_left_out(self):
+        raw = open(self.fileName, 'rb').read()
+        truncated = os.path.join(self.dir, 'truncated.std')
+        with open(truncated, 'wb') as out:
+            out.write(raw[:-3])
+        for index in self.scans(truncated):
+            self.assertEqual(list(index), decoded(self.fileName)[:-1])
+
+if __name__ == '__main__':
+    unittest.main()
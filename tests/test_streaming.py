@@ -0,0 +1,135 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import socket
+import StringIO
+import struct
+import tempfile
+import threading
+import unittest
+
+from pystdf import Parse, Streaming
+from pystdf.Writer import StdfWriter
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'tfile.std')
+
+class Recorder(object):
+    def __init__(self):
+        self.records = []
+        self.ended = []
+
+    def after_send(self, _, record):
+        self.records.append((record.name, list(record.values)))
+
+    def after_complete(self, _):
+        self.ended.append('complete')
+
+    def after_cancel(self, _, exception):
+        self.ended.append('cancel')
+
+class CollectorTest(unittest.TestCase):
+    def setUp(self):
+        self.finished = threading.Event()
+        self.results = []
+        self.server = Streaming.Collector(('127.0.0.1', 0), self.sinks, self.onFinished, chunkSize=64)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        with open(DATA, 'rb') as inp:
+            self.data = inp.read()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def sinks(self, clientAddress):
+        return [Recorder(), StdfWriter(StringIO.StringIO())]
+
+    def onFinished(self, clientAddress, sinks, error):
+        self.results.append((sinks, error))
+        self.finished.set()
+
+    def test_replay(self):
+        Streaming.replay(DATA, self.server.server_address, chunkSize=100)
+        self.assertTrue(self.finished.wait(10))
+        (recorder, writer), error = self.results[0]
+        self.assertIsNone(error)
+        self.assertEqual(recorder.ended, ['complete'])
+        self.assertEqual(recorder.records, [(record.name, list(record.values)) for record in Parse.Reader(DATA)])
+        self.assertTrue(writer.stream.getvalue())
+
+    def test_connection_reset_cancels(self):
+        sock = socket.create_connection(self.server.server_address)
+        sock.sendall(self.data[:len(self.data) // 2])
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        sock.close()                # resets the connection
+        self.assertTrue(self.finished.wait(10))
+        (recorder, writer), error = self.results[0]
+        self.assertTrue(error)
+        self.assertEqual(recorder.ended, ['cancel'])
+        self.assertEqual(bool(writer.stream.getvalue()), bool(recorder.records))    # flushed on cancel
+
+class FileFollowerTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'growing.std')
+        with open(DATA, 'rb') as inp:
+            self.data = inp.read()
+        self.expected = [(record.name, list(record.values)) for record in Parse.Reader(DATA)]
+        self.out = open(self.fileName, 'wb')
+
+    def tearDown(self):
+        self.out.close()
+        shutil.rmtree(self.dir)
+
+    def append(self, data):
+        self.out.write(data)
+        self.out.flush()
+
+    def test_follows_a_growing_file(self):
+        recorder = Recorder()
+        follower = Streaming.FileFollower(self.fileName, [recorder], chunkSize=50)
+        self.assertEqual(follower.poll(), 0)
+        seen = 0
+        for start in range(0, len(self.data), 37):          # cuts through headers and records
+            self.append(self.data[start:start + 37])
+            while follower.poll():
+                pass
+            self.assertTrue(len(recorder.records) >= seen)
+            seen = len(recorder.records)
+            self.assertEqual(recorder.records, self.expected[:seen])
+            self.assertEqual(follower.done, start + 37 >= len(self.data))
+        self.assertEqual(recorder.records, self.expected)
+        self.assertEqual(recorder.ended, ['complete'])      # at the Mrr
+        self.assertIsNone(follower.error)
+
+    def test_stopped_mid_record_cancels(self):
+        recorder = Recorder()
+        follower = Streaming.FileFollower(self.fileName, [recorder])
+        self.append(self.data[:len(self.data) - 10])
+        Streaming.follow([follower], interval=0.01, timeout=0.05)
+        self.assertTrue(follower.done)
+        self.assertEqual(recorder.records, self.expected[:-1])
+        self.assertEqual(recorder.ended, ['cancel'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import IO, Parse
+import stdfdata
+
+class StringTableTest(unittest.TestCase):
+    def test_interning(self):
+        table = IO.StringTable()
+        first = table['units']
+        raw = ''.join(['un', 'its'])
+        self.assertFalse(raw is first)
+        self.assertTrue(table[raw] is first)
+        self.assertEqual((table.misses, len(table)), (1, 1))
+
+    def test_full_table_passes_through(self):
+        table = IO.StringTable(maxSize=2)
+        for raw in ('a', 'b', 'c', 'c'):
+            table.lookups += 1
+            self.assertEqual(table[raw], raw)
+        self.assertEqual(sorted(table), ['a', 'b'])
+        self.assertEqual(table.stats(), dict(strings=2, lookups=4, hits=0, hitRate=0.0))
+
+    def test_empty_stats(self):
+        self.assertEqual(IO.StringTable().stats(), dict(strings=0, lookups=0, hits=0, hitRate=0.0))
+
+class InternedReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, 'parts.std')
+        self.parts = stdfdata.writeParts(self.fileName, wafers=1, radius=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_shared_strings(self):
+        reader = Parse.Reader(self.fileName, internStrings=True)
+        records = list(reader)
+        self.assertEqual([record.values for record in records],
+                         [record.values for record in Parse.Reader(self.fileName)])
+        mprs = [record for record in records if record.name == 'Mpr']
+        self.assertEqual(len(mprs), self.parts)
+        for mpr in mprs:
+            self.assertTrue(mpr.values[mpr.TEST_TXT] is mprs[0].values[mpr.TEST_TXT])
+            self.assertTrue(mpr.values[mpr.UNITS] is mprs[0].values[mpr.UNITS])
+        stats = reader.codec.strings.stats()
+        self.assertEqual(stats['strings'], len(reader.codec.strings))
+        self.assertEqual(stats['hits'] + len(reader.codec.strings), stats['lookups'])
+        self.assertTrue(stats['hits'] >= 3 * (self.parts - 1))      # TEST_TXT, UNITS and UNITS_IN of the Mprs
+
+    def test_not_interned_by_default(self):
+        self.assertEqual(Parse.Reader(self.fileName).codec.strings, None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import Parse, TestIndex
+import stdfdata
+
+def rows(records):
+    return [(record.name, list(record.values)) for record in records]
+
+class TestIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.fileName = os.path.join(cls.dir, 'parts.std')
+        stdfdata.writeParts(cls.fileName)
+        cls.tests = [record for record in Parse.Reader(cls.fileName) if record.name in ('Ptr', 'Mpr', 'Ftr')]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+
+    def expected(self, testNum, head=None, site=None):
+        return rows(record for record in self.tests if record.values[record.TEST_NUM] == testNum and
+                    (head is None or record.values[record.HEAD_NUM] == head) and
+                    (site is None or record.values[record.SITE_NUM] == site))
+
+    def test_iter_test(self):
+        reader = Parse.Reader(self.fileName)
+        for testNum in stdfdata.TESTS + (stdfdata.MPR_TEST,):
+            self.assertEqual(rows(reader.iter_test(testNum)), self.expected(testNum))
+
+    def test_iter_test_by_head_and_site(self):
+        reader = Parse.Reader(self.fileName)
+        self.assertEqual(rows(reader.iter_test(101, site=2)), self.expected(101, site=2))
+        self.assertEqual(rows(reader.iter_test(stdfdata.MPR_TEST, head=1, site=3)),
+                         self.expected(stdfdata.MPR_TEST, head=1, site=3))
+        self.assertEqual(list(reader.iter_test(101, head=2)), [])
+        self.assertEqual(list(reader.iter_test(999)), [])
+
+    def test_iter_test_after_iteration(self):
+        reader = Parse.Reader(self.fileName)
+        self.assertTrue(list(reader))
+        self.assertEqual(rows(reader.iter_test(102, site=4)), self.expected(102, site=4))
+
+    def test_test_numbers_and_deltas(self):
+        index = Parse.Reader(self.fileName).testIndex()
+        self.assertEqual(index.testNumbers(), sorted(stdfdata.TESTS + (stdfdata.MPR_TEST,)))
+        buf = bytearray()
+        for delta in (5, 127, 128, 300, 1 << 40):
+            TestIndex.encodeDelta(buf, delta)
+        self.assertEqual(list(TestIndex.decodeDeltas(buf)), [5, 132, 260, 560, 560 + (1 << 40)])
+
+if __name__ == '__main__':
+    unittest.main()
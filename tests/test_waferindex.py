@@ -0,0 +1,103 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pystdf import Parse, WaferIndex
+import stdfdata
+
+class WaferIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.fileName = os.path.join(cls.dir, 'parts.std')
+        stdfdata.writeParts(cls.fileName, wafers=2, radius=5)
+        cls.bins, cls.names, wafer = dict(), dict(), 0      # wafer number to (x, y) to the last bins
+        for record in Parse.Reader(cls.fileName):
+            if record.name == 'Wir':
+                wafer += 1
+                cls.names[wafer] = record.values[record.WAFER_ID]
+            elif record.name == 'Prr':
+                values = record.values
+                cls.bins.setdefault(wafer, dict())[(values[record.X_COORD], values[record.Y_COORD])] = (
+                    values[record.HARD_BIN], values[record.SOFT_BIN])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+
+    def setUp(self):
+        self.index = Parse.Reader(self.fileName).waferIndex()
+
+    def test_wafers(self):
+        self.assertEqual(len(self.index), 2)
+        for wafer in self.index:
+            self.assertEqual(wafer.name, self.names[wafer.waferId])
+            self.assertEqual(wafer.bins, self.bins[wafer.waferId])
+            self.assertEqual(self.index.byName(wafer.name), [wafer])
+        self.assertEqual(len(self.index[1].parts(0, -5)), 2)        # the first dies are retested
+        self.assertEqual(self.index[1].parts(9, 9), [])
+        self.assertEqual(self.index[1].bin(0, 0, soft=True), self.bins[1][(0, 0)][1])
+
+    def test_region_queries(self):
+        for wafer in self.index:
+            dies = self.bins[wafer.waferId]
+            self.assertEqual(sorted(wafer.region(-2, 1, 3, 4)),
+                             sorted(die for die in dies if -2 <= die[0] <= 3 and 1 <= die[1] <= 4))
+            for x, y in ((0, 0), (4, -3), (7, 7), (-5, 0)):
+                for radius in (0, 1, 2.5, 4):
+                    self.assertEqual(sorted(wafer.within(x, y, radius)),
+                                     sorted(die for die in dies
+                                            if (die[0] - x) ** 2 + (die[1] - y) ** 2 <= radius * radius))
+                for rings in (1, 2):
+                    self.assertEqual(sorted(wafer.neighbors(x, y, rings)),
+                                     sorted(die for die in dies if die != (x, y) and
+                                            max(abs(die[0] - x), abs(die[1] - y)) <= rings))
+            self.assertEqual(len(wafer.neighbors(0, 0)), 8)
+
+    def checkBinMap(self, soft):
+        for wafer in self.index:
+            grid, xMin, yMin = wafer.binMap(soft=soft, missing=-7)
+            dies = self.bins[wafer.waferId]
+            self.assertEqual((xMin, yMin), (-5, -5))
+            self.assertEqual(len(grid), 11)
+            for y in range(-5, 6):
+                for x in range(-5, 6):
+                    self.assertEqual(grid[y - yMin][x - xMin], dies[(x, y)][soft] if (x, y) in dies else -7)
+        return grid
+
+    @unittest.skipUnless(WaferIndex.have_numpy, 'NumPy is not installed')
+    def test_bin_map_numpy(self):
+        grid = self.checkBinMap(False)
+        self.assertEqual(grid.shape, (11, 11))
+        self.checkBinMap(True)
+
+    def test_bin_map_lists(self):
+        haveNumpy, WaferIndex.have_numpy = WaferIndex.have_numpy, False
+        try:
+            self.assertTrue(isinstance(self.checkBinMap(True), list))
+        finally:
+            WaferIndex.have_numpy = haveNumpy
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import bz2
+import gzip
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+
+from pystdf import IO, Parse, V4
+import stdfdata
+
+WHERE = {'Ptr': {'SITE_NUM': 3, 'TEST_NUM': lambda testNum: testNum >= 101}, 'Prr': {'SITE_NUM': (1, 2)}}
+
+def wanted(record):
+    if record.name == 'Ptr':
+        return record.values[record.SITE_NUM] == 3 and record.values[record.TEST_NUM] >= 101
+    if record.name == 'Prr':
+        return record.values[record.SITE_NUM] in (1, 2)
+    return True
+
+class Keep(object):
+    def __init__(self):
+        self.records = []
+
+    def after_send(self, _, record):
+        self.records.append((record.name, list(record.values)))
+
+class CompileFilterTest(unittest.TestCase):
+    def body(self, **values):
+        return struct.pack('<IBBBBf', values.get('TEST_NUM', 1), values.get('HEAD_NUM', 1), values.get('SITE_NUM', 1),
+                           0, 0, values.get('RESULT', 0.5))
+
+    def accept(self, conditions, **values):
+        return IO.compileFilter(V4.Ptr._fields, conditions, '<')(self.body(**values))
+
+    def test_number(self):
+        self.assertTrue(self.accept({'SITE_NUM': 2}, SITE_NUM=2))
+        self.assertFalse(self.accept({'SITE_NUM': 2}, SITE_NUM=3))
+
+    def test_float(self):
+        self.assertTrue(self.accept({'RESULT': 1.0}, RESULT=1.0))
+        self.assertFalse(self.accept({'RESULT': 1.0}, RESULT=0.5))
+
+    def test_callable_and_container(self):
+        self.assertTrue(self.accept({'TEST_NUM': lambda testNum: testNum > 5, 'SITE_NUM': set([1, 2])},
+                                    TEST_NUM=6, SITE_NUM=2))
+        self.assertFalse(self.accept({'TEST_NUM': lambda testNum: testNum > 5, 'SITE_NUM': (1, 2)},
+                                     TEST_NUM=6, SITE_NUM=4))
+
+    def test_size(self):
+        self.assertEqual(IO.compileFilter(V4.Ptr._fields, {'SITE_NUM': 1}, '<').size, 6)
+        self.assertEqual(IO.compileFilter(V4.Ptr._fields, {'RESULT': 1.0}, '<').size, 12)
+
+    def test_rejected_conditions(self):
+        for condition in ('3', None, object()):
+            self.assertRaises(ValueError, IO.compileFilter, V4.Ptr._fields, {'SITE_NUM': condition}, '<')
+        self.assertRaises(ValueError, IO.compileFilter, V4.Ptr._fields, {'TEST_TXT': 'x'}, '<')
+
+class WhereTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.fileName = os.path.join(cls.dir, 'parts.std')
+        stdfdata.writeParts(cls.fileName)
+        with open(cls.fileName, 'rb') as inp:
+            cls.data = inp.read()
+        for suffix, opener in (('.gz', gzip.open), ('.bz2', bz2.BZ2File)):
+            out = opener(cls.fileName + suffix, 'wb')
+            out.write(cls.data)
+            out.close()
+        cls.expected = [(record.name, list(record.values)) for record in Parse.Reader(cls.fileName) if wanted(record)]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+
+    def filtered(self, fileName, **options):
+        keep = Keep()
+        Parse.process_file(fileName, [keep], where=WHERE, **options)
+        return keep.records
+
+    def test_file(self):
+        self.assertEqual(self.filtered(self.fileName), self.expected)
+
+    def test_mapped(self):
+        self.assertEqual(self.filtered(self.fileName, mapped=True), self.expected)
+
+    def test_compressed(self):
+        self.assertEqual(self.filtered(self.fileName + '.gz'), self.expected)
+        self.assertEqual(self.filtered(self.fileName + '.bz2'), self.expected)
+
+    def test_pipe(self):
+        read, write = os.pipe()
+        writer = threading.Thread(target=lambda: os.fdopen(write, 'wb').write(self.data))
+        writer.start()
+        keep = Keep()
+        with os.fdopen(read, 'rb') as inp:
+            p = Parse.Parser(inp=inp, where=WHERE)
+            p.addSink(keep)
+            p.parse()
+        writer.join()
+        self.assertEqual(keep.records, self.expected)
+
+    def test_float_condition(self):
+        keep = Keep()
+        Parse.process_file(self.fileName, [keep], where={'Ptr': {'RESULT': 0.5}})
+        results = [values[V4.Ptr.RESULT] for name, values in keep.records if name == 'Ptr']
+        self.assertTrue(results)
+        self.assertEqual(set(results), set([0.5]))
+
+if __name__ == '__main__':
+    unittest.main()
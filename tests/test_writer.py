@@ -0,0 +1,87 @@
+#
+# PySTDF - The Pythonic STDF Parser
+# Copyright (C) 2006 Casey Marshall
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#
+
+import os
+import StringIO
+import tempfile
+import unittest
+
+from pystdf import IO, Parse, V4
+from pystdf.Writer import StdfWriter
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'tfile.std')
+
+def records(data):
+    return [(record.name, record.values) for record in Parse.Reader(data)]
+
+class StdfRoundTripTest(unittest.TestCase):
+    def roundTrip(self, **options):
+        fd, fileName = tempfile.mkstemp(suffix='.std')
+        try:
+            with os.fdopen(fd, 'wb') as out, open(DATA, 'rb') as inp:
+                writer = StdfWriter(out)
+                p = Parse.Parser(inp=inp, **options)
+                p.addSink(writer)
+                p.parse()
+                writer.flush()
+            return records(fileName)
+        finally:
+            os.remove(fileName)
+
+    def test_round_trip(self):
+        self.assertEqual(self.roundTrip(), records(DATA))
+
+    @unittest.skipUnless(IO.have_numpy, 'NumPy is not installed')
+    def test_numpy_arrays_round_trip(self):
+        self.assertEqual(self.roundTrip(numpyArrays=True), records(DATA))
+
+class Watcher(object):
+    "Notes how much the writer has written when each record is sent"
+    def __init__(self, stream):
+        self.stream = stream
+        self.written = []
+
+    def after_send(self, _, record):
+        self.written.append(len(self.stream.getvalue()))
+
+class StdfWriterBufferTest(unittest.TestCase):
+    def test_standalone_writes_through(self):
+        writer = StdfWriter(StringIO.StringIO(), IO.Codec('<'))
+        writer.writeRecord(V4.Far(CPU_TYPE=2, STDF_VER=4))
+        self.assertEqual(writer.stream.getvalue(), '\x02\x00\x00\x0a\x02\x04')
+        writer.writeRecords([V4.Pir(HEAD_NUM=1, SITE_NUM=1), V4.Pir(HEAD_NUM=1, SITE_NUM=2)])
+        self.assertEqual(len(writer.stream.getvalue()), 6 + 2 * 6)
+
+    def test_buffered_while_attached(self):
+        stream = StringIO.StringIO()
+        writer, watcher = StdfWriter(stream), Watcher(stream)
+        with open(DATA, 'rb') as inp:
+            parser = Parse.Parser(inp=inp)
+            parser.addSink(writer)
+            parser.addSink(watcher)
+            parser.parse()
+        self.assertEqual(set(watcher.written), {0})
+        size = len(stream.getvalue())
+        self.assertTrue(size > 0)
+        writer.writeRecord(V4.Pir(HEAD_NUM=1, SITE_NUM=1))          # standalone again after the parse
+        self.assertEqual(len(stream.getvalue()), size + 6)
+
+if __name__ == '__main__':
+    unittest.main()